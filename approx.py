@@ -0,0 +1,164 @@
+"""Approximate answers from the stratified sample, refined to exact ones in the background.
+
+With "Approximate answers" switched on in the sidebar, the sections a page
+passes to ``answer_scope`` are built from an ``ApproxScope``: group means and
+claim totals are estimated from the stratified sample (sampling.py) and come
+with 95% confidence intervals, shown as "± $x" on the KPIs and as error bars
+on the bar charts. Row counts, column statistics, correlations and the
+row-level charts stay exact.
+
+"Compute exact answers" builds the same sections from the exact scope on a
+background thread, which stores them in the figure cache (figure_cache.py);
+once it finishes, the page reruns and shows the exact sections, for every
+session viewing that segment.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+import sampling
+from sections import Scope
+
+STATE_KEY = 'approximate'
+KEPT_REFINEMENTS = 32
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='refinement')
+_lock = threading.Lock()
+_refinements = OrderedDict()  # (dataset version, filters, sections) -> Refinement, oldest first
+
+
+class ApproxScope(Scope):
+    """A segment whose group summaries and column totals are estimated from the stratified sample."""
+
+    def __init__(self, exact, sample):
+        super().__init__(exact.frame, exact.label, exact.positions, exact.selection)
+        self.exact = exact
+        self.sample = sample
+
+    @property
+    def filters(self):
+        # Approximate sections are cached apart from the exact ones
+        return ['approximate', self.sample.per_stratum, self.exact.filters]
+
+    # Everything not estimated from the sample is the exact scope's
+
+    @property
+    def n_rows(self):
+        return self.exact.n_rows
+
+    @property
+    def cube(self):
+        return self.exact.cube
+
+    @property
+    def stats(self):
+        return self.exact.stats
+
+    @property
+    def profile(self):
+        return self.exact.profile
+
+    @property
+    def engine(self):
+        return self.exact.engine
+
+    def matrix(self, method='pearson'):
+        return self.exact.matrix(method)
+
+    def summary(self, dimension):
+        return self.sample.summary(dimension, self.selection)
+
+    def describe(self, columns):
+        return self.sample.describe(columns, self.selection)
+
+
+class Refinement:
+    """Progress of one background build of exact sections."""
+
+    def __init__(self, total):
+        self.built = 0
+        self.total = total
+        self.error = None
+        self.future = None
+
+    @property
+    def progress(self):
+        return self.built / self.total
+
+    @property
+    def finished(self):
+        return self.future.done() and self.error is None
+
+
+def _key(scope, builders):
+    return scope.version, repr(scope.filters), tuple(build.__name__ for build in builders)
+
+
+def _run(scope, builders, refinement):
+    try:
+        for build in builders:
+            scope.section(build)
+            refinement.built += 1
+    except Exception as exc:
+        refinement.error = exc
+
+
+def refine(scope, builders):
+    """Start building ``builders`` from the exact ``scope`` in the background (once per segment)."""
+    key = _key(scope, builders)
+    with _lock:
+        refinement = _refinements.get(key)
+        if refinement is None or refinement.error is not None:
+            refinement = Refinement(len(builders))
+            refinement.future = _executor.submit(_run, scope, builders, refinement)
+            _refinements[key] = refinement
+        while len(_refinements) > KEPT_REFINEMENTS:
+            _refinements.popitem(last=False)
+    return refinement
+
+
+@st.fragment(run_every=1.0)
+def _progress(refinement):
+    if refinement.finished or refinement.error is not None:
+        st.rerun()
+    st.progress(refinement.progress,
+                text=f"Computing exact answers: {refinement.built} of {refinement.total} sections")
+
+
+def answer_scope(scope, builders):
+    """The scope to build ``builders`` from: ``scope``, or its approximate twin in approximate mode.
+
+    Renders the sidebar toggle, and in approximate mode the notice with the
+    "Compute exact answers" button or the progress of the exact build.
+    """
+    # Widget values are dropped when another page runs, so the mode is kept in the session state
+    saved = st.session_state.setdefault(STATE_KEY, False)
+    if f'_{STATE_KEY}' not in st.session_state:
+        st.session_state[f'_{STATE_KEY}'] = saved
+    approximate = st.sidebar.toggle(
+        "Approximate answers", key=f'_{STATE_KEY}',
+        help="Estimate group means and claim totals from a stratified sample, with 95% confidence intervals")
+    st.session_state[STATE_KEY] = approximate
+    if not approximate:
+        return scope
+
+    with _lock:
+        refinement = _refinements.get(_key(scope, builders))
+    if refinement is not None and refinement.finished:
+        st.caption("Exact answers, computed in the background.")
+        return scope
+
+    sample = sampling.load_sample()
+    if refinement is None or refinement.error is not None:
+        if refinement is not None:
+            st.error(f"Computing the exact answers failed: {refinement.error}")
+        notice, action = st.columns([5, 1], vertical_alignment='center')
+        notice.info(f"Approximate answers from a stratified sample of {len(sample.rows):,} of "
+                    f"{sample.n_rows:,} rows, with 95% confidence intervals.")
+        action.button("Compute exact answers", on_click=refine, args=(scope, builders))
+    else:
+        _progress(refinement)
+    return ApproxScope(scope, sample)
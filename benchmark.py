@@ -0,0 +1,208 @@
+"""Scale benchmarks for the pipeline and the pages.
+
+    python benchmark.py --sizes 100k 1m 10m --label my-branch
+    python benchmark.py compare benchmarks/results/main.json benchmarks/results/my-branch.json
+
+For every size a synthetic raw extract is generated (synthetic.py, cached
+under benchmarks/data) and each stage is timed, then run a second time for
+its peak Python-tracked memory (tracemalloc, which includes NumPy buffers
+but not Arrow's own allocations). Tracing slows allocation-heavy stages
+down, so the times come from the untraced run; ``--no-memory`` skips the
+traced runs:
+
+- clean, impute: cleaning.py and imputation.py on the raw extract
+- load_csv, load_parquet: reading the cleaned dataset back
+- column_summaries, groupby_aggregates, correlation: the derived artifacts
+- engine_pandas, engine_duckdb, engine_polars: every page aggregation on
+  the Parquet file with each installed query engine (engines.py); DuckDB's
+  and Polars' own memory is not traced
+- figures_home, figures_univariate, figures_multivariate: building and
+  serializing what each page renders
+
+Results are written as JSON under benchmarks/results so runs of different
+versions can be compared.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+
+import plotly.express as px
+
+import cleaning
+import column_profile
+import column_stats
+import columnar
+import correlation
+import cube
+import data
+import engines
+import imputation
+import schema
+from scatter import scatter_figure
+from synthetic import ClaimsGenerator
+
+BENCH_DIR = data.BASE_DIR / 'benchmarks'
+SIZES = {'k': 1_000, 'm': 1_000_000}
+
+
+def parse_size(text):
+    text = text.lower()
+    if text[-1] in SIZES:
+        return int(float(text[:-1]) * SIZES[text[-1]])
+    return int(text)
+
+
+class Recorder:
+    """Times stages, and records their peak traced memory in a separate run."""
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.stages = {}
+
+    def run(self, name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        seconds = time.perf_counter() - start
+        peak_mb = self._peak_mb(fn, *args) if self.memory else None
+        self.stages[name] = {'seconds': round(seconds, 4), 'peak_mb': peak_mb}
+        memory = f"{peak_mb:10.1f} MB" if peak_mb is not None else ''
+        print(f"  {name:<22} {seconds:9.3f}s {memory}")
+        return result
+
+    @staticmethod
+    def _peak_mb(fn, *args):
+        tracemalloc.start()
+        try:
+            fn(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return round(peak / 2 ** 20, 2)
+
+
+def _clean(raw_path):
+    return list(cleaning.iter_clean(raw_path, fill=False))
+
+
+def _impute(chunks):
+    imputer = imputation.NeighbourImputer().fit(chunks)
+    return [imputer.transform(chunk).fillna(cleaning.FILL_VALUES) for chunk in chunks]
+
+
+def _write_cleaned(chunks, csv_path, parquet_path):
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(csv_path, mode='w' if i == 0 else 'a', header=i == 0)
+    columnar.write(data.read_csv(csv_path, 'cleaned'), parquet_path)
+
+
+def _column_summaries(df):
+    return column_profile.profile_frame(df), column_stats.compute(df, schema.numeric_columns())
+
+
+def _figures_home(df, profile):
+    catalog = [(col, str(p.dtype), p.unique, p.min, p.max, p.mean) for col, p in profile.items()]
+    return json.dumps(catalog, default=str), df.head().to_json()
+
+
+def _figures_univariate(df, stats):
+    figures = [column_stats.histogram_figure(stats.histogram(col, nbins), col, col)
+               for col, nbins in [('age', 40), ('income', 50), ('clm_freq', 20), ('yoj', 30)]]
+    gender = df['gender'].value_counts().reset_index()
+    gender.columns = ['Gender', 'Count']
+    figures += [px.bar(gender, x='Gender', y='Count'), px.pie(gender, values='Count', names='Gender')]
+    return [fig.to_json() for fig in figures]
+
+
+def _figures_multivariate(df, claims_cube, matrix):
+    figures = [scatter_figure(df, 'age', 'clm_amt', 'Claim Amount vs Age'),
+               scatter_figure(df, 'income', 'clm_amt', 'Claim Amount vs Income')]
+    for dim in cube.DIMENSIONS:
+        part = cube.summary(claims_cube, dim)[['clm_amt_mean']].reset_index()
+        figures.append(px.bar(part, x='value', y='clm_amt_mean'))
+    figures.append(px.imshow(matrix.round(2), text_auto=True))
+    return [fig.to_json() for fig in figures]
+
+
+def run_size(n_rows, generator, memory=True):
+    """Run every stage on a synthetic dataset of ``n_rows`` rows."""
+    data_dir = BENCH_DIR / 'data'
+    data_dir.mkdir(parents=True, exist_ok=True)
+    raw_path = data_dir / f'synthetic_{n_rows}.csv'
+    if not raw_path.exists():
+        print(f"Generating {n_rows:,} rows ...")
+        generator.write(n_rows, raw_path)
+    csv_path = data_dir / f'synthetic_{n_rows}_clean.csv'
+    parquet_path = data_dir / f'synthetic_{n_rows}_clean.parquet'
+
+    print(f"{n_rows:,} rows")
+    rec = Recorder(memory)
+    chunks = rec.run('clean', _clean, raw_path)
+    chunks = rec.run('impute', _impute, chunks)
+    _write_cleaned(chunks, csv_path, parquet_path)
+    del chunks
+
+    rec.run('load_csv', data.read_csv, csv_path, 'cleaned')
+    df = rec.run('load_parquet', columnar.read, parquet_path)
+    profile, stats = rec.run('column_summaries', _column_summaries, df)
+    claims_cube = rec.run('groupby_aggregates', cube.build, df)
+    matrix = rec.run('correlation', correlation.pearson, df, schema.numeric_columns())
+    for name in engines.ENGINES:
+        try:
+            engine = engines.get(name, [parquet_path])
+        except ImportError:
+            continue
+        rec.run(f'engine_{name}', engines.workload, engine)
+    rec.run('figures_home', _figures_home, df, profile)
+    rec.run('figures_univariate', _figures_univariate, df, stats)
+    rec.run('figures_multivariate', _figures_multivariate, df, claims_cube, matrix)
+    return {'rows': n_rows, 'stages': rec.stages}
+
+
+def compare(base_path, new_path):
+    """Print the time and memory ratios of two result files (new / base)."""
+    base = {r['rows']: r['stages'] for r in json.loads(Path(base_path).read_text())['results']}
+    new = {r['rows']: r['stages'] for r in json.loads(Path(new_path).read_text())['results']}
+    print(f"{'rows':>12} {'stage':<22} {'time':>8} {'memory':>8}")
+    for rows in sorted(base.keys() & new.keys()):
+        for stage in [s for s in base[rows] if s in new[rows]]:
+            b, n = base[rows][stage], new[rows][stage]
+            time_ratio = n['seconds'] / b['seconds'] if b['seconds'] else float('nan')
+            mem_ratio = n['peak_mb'] / b['peak_mb'] if b['peak_mb'] and n['peak_mb'] is not None else float('nan')
+            print(f"{rows:>12,} {stage:<22} {time_ratio:7.2f}x {mem_ratio:7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', nargs='?', default='run', choices=['run', 'compare'])
+    parser.add_argument('files', nargs='*', help='compare: base and new result files')
+    parser.add_argument('--sizes', nargs='+', default=['100k', '1m'], help='dataset sizes, e.g. 100k 1m 10m')
+    parser.add_argument('--label', default='latest', help='name of the result file')
+    parser.add_argument('--no-memory', action='store_true', help='time the stages only, without the traced runs')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        compare(*args.files)
+        return
+
+    generator = ClaimsGenerator()
+    # Plotly loads its figure schema on first use; keep that out of the page timings
+    px.bar(x=[0], y=[0]).to_json()
+    results = [run_size(parse_size(size), generator, not args.no_memory) for size in args.sizes]
+    output = BENCH_DIR / 'results' / f'{args.label}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'label': args.label,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'results': results,
+    }, indent=2))
+    print(f"Wrote {output}")
+
+
+if __name__ == '__main__':
+    main()
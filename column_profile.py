@@ -0,0 +1,168 @@
+"""Column profiles for the Home page catalog, from one chunked scan.
+
+A ``ColumnProfile`` holds the exact row, null, min, max and sum figures of a
+column, a ``DistinctCounter`` and (for numeric columns) a ``QuantileSketch``.
+Profiles are built chunk by chunk, so files larger than memory can be
+scanned, and two profiles of the same column merge, so Parquet row groups can
+be profiled on a process pool and daily partitions folded into an existing
+profile. The app profiles in its own process, one row group at a time; the
+pool is used by the CLI and ingest.py:
+
+    python column_profile.py [--jobs N]    # build and store the current dataset's profiles
+"""
+
+import argparse
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import data
+import schema
+from sketches import DistinctCounter, QuantileSketch, hash_values
+
+PROFILE_DIR = data.BASE_DIR / 'artifacts' / 'column_profiles'
+CHUNKSIZE = 100_000
+
+_lock = threading.Lock()
+_profiles = {}  # dataset version -> {column: ColumnProfile}
+
+
+class ColumnProfile:
+    """Mergeable summary of one column."""
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        self.rows = 0
+        self.nulls = 0
+        self.min = np.nan
+        self.max = np.nan
+        self.sum = 0.0
+        self.distinct = DistinctCounter()
+        self.quantile_sketch = QuantileSketch() if self.numeric else None
+
+    def update(self, series):
+        self.rows += len(series)
+        self.nulls += int(series.isna().sum())
+        self.distinct.update(hash_values(series))
+        if self.numeric:
+            values = series.to_numpy(dtype='float64', na_value=np.nan)
+            if self.rows > self.nulls:
+                self.min = np.fmin(self.min, np.nanmin(values, initial=np.inf))
+                self.max = np.fmax(self.max, np.nanmax(values, initial=-np.inf))
+            self.sum += float(np.nansum(values))
+            self.quantile_sketch.update(values)
+        return self
+
+    def merge(self, other):
+        merged = ColumnProfile(self.dtype)
+        merged.rows = self.rows + other.rows
+        merged.nulls = self.nulls + other.nulls
+        merged.min = np.fmin(self.min, other.min)
+        merged.max = np.fmax(self.max, other.max)
+        merged.sum = self.sum + other.sum
+        merged.distinct = self.distinct.merge(other.distinct)
+        if self.numeric:
+            merged.quantile_sketch = self.quantile_sketch.merge(other.quantile_sketch)
+        return merged
+
+    @property
+    def count(self):
+        return self.rows - self.nulls
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else np.nan
+
+    @property
+    def unique(self):
+        return self.distinct.estimate()
+
+    def quantiles(self, qs=(0.25, 0.5, 0.75)):
+        return self.quantile_sketch.quantiles(qs)
+
+
+def profile_frame(df):
+    """Profiles of every column of one DataFrame (or chunk)."""
+    return {col: ColumnProfile(df[col].dtype).update(df[col]) for col in df.columns}
+
+
+def merge_profiles(*profiles):
+    """Merge per-column profiles of the same dataset (chunks, workers, partitions)."""
+    merged = {}
+    for profile in profiles:
+        for col, column_profile in profile.items():
+            merged[col] = merged[col].merge(column_profile) if col in merged else column_profile
+    return merged
+
+
+def _profile_row_group(path, row_group):
+    return profile_frame(pq.ParquetFile(path).read_row_group(row_group).to_pandas())
+
+
+def profile_file(path, n_jobs=1, chunksize=CHUNKSIZE):
+    """Profile a cleaned dataset file in chunks.
+
+    Parquet row groups are profiled one after the other, or on ``n_jobs``
+    processes (None: one per CPU); CSV files are read sequentially in
+    ``chunksize`` rows.
+    """
+    path = Path(path)
+    if path.suffix == '.parquet':
+        n_groups = pq.ParquetFile(path).num_row_groups
+        n_jobs = min(n_jobs or os.cpu_count(), n_groups)
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                return merge_profiles(*executor.map(_profile_row_group, [path] * n_groups, range(n_groups)))
+        return merge_profiles(*(_profile_row_group(path, g) for g in range(n_groups)))
+
+    profile = {}
+    for chunk in pd.read_csv(path, index_col=0, chunksize=chunksize):
+        profile = merge_profiles(profile, profile_frame(schema.apply_cleaned(chunk)))
+    return profile
+
+
+def profile_path(version):
+    return PROFILE_DIR / f'{version[:16]}.pkl'
+
+
+def save(profile, version):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = profile_path(version)
+    with open(path, 'wb') as f:
+        pickle.dump(profile, f)
+    return path
+
+
+def load_profile(n_jobs=1):
+    """Column profiles of the current cleaned dataset, built (on ``n_jobs`` processes) and stored on first use."""
+    version = data.dataset_version('cleaned')
+    with _lock:
+        if version not in _profiles:
+            path = profile_path(version)
+            if path.exists():
+                with open(path, 'rb') as f:
+                    _profiles[version] = pickle.load(f)
+            else:
+                _profiles[version] = merge_profiles(*(profile_file(path, n_jobs)
+                                                      for path in data.source_paths('cleaned')))
+                save(_profiles[version], version)
+        return _profiles[version]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: one per CPU)')
+    args = parser.parse_args()
+    profile = load_profile(args.jobs)
+    print(f"Profiles of {len(profile)} columns at {profile_path(data.dataset_version('cleaned'))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""One-pass descriptive statistics and histograms for the numeric columns.
+
+The Univariate page used to call describe(), median() and the zero counts
+separately for each column it shows and let ``px.histogram`` bin the raw
+values in the browser. ``compute`` handles all numeric columns in one
+vectorized pass over a 2-D array: describe() statistics, sums, zero counts
+and histogram bin counts at each requested ``nbins``. The page then charts
+the bin counts as bar traces, so only the counts are sent to the browser.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import data
+import schema
+
+DEFAULT_NBINS = (20, 30, 40, 50)
+DESCRIBE_ROWS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+_lock = threading.Lock()
+_stats = {}  # dataset version -> ColumnStats
+
+
+class Histogram:
+    """Bin edges and counts of one column."""
+
+    def __init__(self, edges, counts):
+        self.edges = edges
+        self.counts = counts
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+
+class ColumnStats:
+    """Statistics of every numeric column, as produced by ``compute``."""
+
+    def __init__(self, table, histograms, n_rows):
+        # Rows: describe() statistics, then 'sum' and 'zeros'; one column per data column
+        self.table = table
+        self.histograms = histograms  # (column, nbins) -> Histogram
+        self.n_rows = n_rows
+
+    def describe(self, column):
+        """The same values as ``df[column].describe()``."""
+        return self.table.loc[DESCRIBE_ROWS, column]
+
+    def __getitem__(self, column):
+        return self.table[column]
+
+    def histogram(self, column, nbins):
+        return self.histograms[(column, nbins)]
+
+
+def _histograms(values, minimum, maximum, nbins):
+    # Equal-width bins for all columns at once; column j uses bins j*nbins .. (j+1)*nbins - 1
+    width = np.where(maximum > minimum, (maximum - minimum) / nbins, 1.0)
+    idx = np.floor((values - minimum) / width)
+    idx = np.clip(idx, 0, nbins - 1) + np.arange(values.shape[1]) * nbins
+    valid = ~np.isnan(values)
+    counts = np.bincount(idx[valid].astype('int64'), minlength=nbins * values.shape[1])
+    return counts.reshape(values.shape[1], nbins), width
+
+
+def compute(df, columns=None, nbins=DEFAULT_NBINS):
+    """Statistics and histograms of the numeric ``columns`` of ``df``."""
+    columns = columns or [col for col in df.columns
+                          if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+    values = df[columns].to_numpy(dtype='float64', na_value=np.nan)
+
+    count = (~np.isnan(values)).sum(axis=0)
+    minimum = np.nanmin(values, axis=0)
+    maximum = np.nanmax(values, axis=0)
+    total = np.nansum(values, axis=0)
+    # Like describe(): no mean without values, no std below two values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        std = np.sqrt(np.nansum((values - mean) ** 2, axis=0) / (count - 1))
+    quartiles = np.nanquantile(values, [0.25, 0.5, 0.75], axis=0)
+    zeros = (values == 0).sum(axis=0)
+
+    table = pd.DataFrame(
+        np.vstack([count, mean, std, minimum, quartiles, maximum, total, zeros]),
+        index=DESCRIBE_ROWS + ['sum', 'zeros'], columns=columns)
+
+    histograms = {}
+    for n in nbins:
+        counts, width = _histograms(values, minimum, maximum, n)
+        for j, col in enumerate(columns):
+            edges = minimum[j] + width[j] * np.arange(n + 1)
+            histograms[(col, n)] = Histogram(edges, counts[j])
+    return ColumnStats(table, histograms, len(df))
+
+
+def load_stats():
+    """Statistics of the current cleaned dataset, computed once per version."""
+    version = data.dataset_version('cleaned')
+    with _lock:
+        if version not in _stats:
+            columns = schema.numeric_columns()
+            _stats[version] = compute(data.load_cleaned(columns), columns)
+        return _stats[version]
+
+
+def histogram_figure(hist, title, label):
+    """Bar chart of pre-binned counts, styled like ``px.histogram``."""
+    fig = go.Figure(go.Bar(x=hist.centers, y=hist.counts, width=np.diff(hist.edges),
+                           customdata=np.column_stack([hist.edges[:-1], hist.edges[1:]]),
+                           hovertemplate=f'{label}: %{{customdata[0]:,.4g}} - %{{customdata[1]:,.4g}}'
+                                         '<br>Count: %{y}<extra></extra>'))
+    fig.update_layout(title=title, xaxis_title=label, yaxis_title='Count', bargap=0)
+    return fig
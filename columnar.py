@@ -0,0 +1,76 @@
+"""Typed Parquet copies of the CSV datasets.
+
+    python columnar.py            # convert cleaned_df.csv and car_insurance_claim.csv
+    python columnar.py --cleaned  # only the cleaned dataset
+
+Each Parquet file records the sha256 of the CSV it was built from, so the
+loaders in data.py can tell when it is out of date and fall back to the CSV.
+Reads are memory-mapped and only touch the requested columns.
+"""
+
+import argparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+SOURCE_KEY = b'source_sha256'
+
+
+def write(df, path, source_version=None):
+    """Write a typed frame to Parquet, tagging it with its source CSV version."""
+    table = pa.Table.from_pandas(df)
+    if source_version:
+        metadata = dict(table.schema.metadata or {})
+        metadata[SOURCE_KEY] = source_version.encode()
+        table = table.replace_schema_metadata(metadata)
+    pq.write_table(table, path)
+
+
+def read(path, columns=None):
+    """Read (a projection of) a Parquet file through a memory map."""
+    return pd.read_parquet(path, columns=columns, engine='pyarrow', memory_map=True)
+
+
+def column_names(path):
+    """Data column names stored in a Parquet file (index columns excluded)."""
+    parquet_schema = pq.read_schema(path)
+    pandas_meta = parquet_schema.pandas_metadata or {}
+    index = {name for name in pandas_meta.get('index_columns', []) if isinstance(name, str)}
+    return [name for name in parquet_schema.names if name not in index]
+
+
+def row_count(path):
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def source_version(path):
+    """The sha256 of the CSV a Parquet file was built from (None if untagged)."""
+    value = (pq.read_schema(path).metadata or {}).get(SOURCE_KEY)
+    return value.decode() if value else None
+
+
+def export(kind):
+    """Convert the cleaned or raw CSV to its Parquet copy."""
+    from data import CLEANED_CSV, CLEANED_PARQUET, RAW_CSV, RAW_PARQUET, file_version, read_csv
+
+    csv, parquet = (CLEANED_CSV, CLEANED_PARQUET) if kind == 'cleaned' else (RAW_CSV, RAW_PARQUET)
+    df = read_csv(csv, kind)
+    write(df, parquet, file_version(csv))
+    return parquet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cleaned', action='store_true', help='only convert cleaned_df.csv')
+    parser.add_argument('--raw', action='store_true', help='only convert car_insurance_claim.csv')
+    args = parser.parse_args()
+
+    kinds = [kind for kind, flag in (('cleaned', args.cleaned), ('raw', args.raw)) if flag]
+    for kind in kinds or ['cleaned', 'raw']:
+        print(f"Wrote {export(kind)}")
+
+
+if __name__ == '__main__':
+    main()
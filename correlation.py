@@ -0,0 +1,127 @@
+"""Correlation matrix of all numeric columns from mergeable moments.
+
+``Moments`` holds, for every pair of columns (i, j), the number of rows where
+both are present and the sums of x_i, x_i^2 and x_i * x_j over those rows.
+They are a handful of matrix products (BLAS), add up across chunks, workers
+and ingested batches, and give the pairwise-complete Pearson matrix.
+Spearman correlation is Pearson on ranks; ranks are global, so it is computed
+from the full columns rather than from mergeable moments.
+
+The moments of the current dataset version are stored under
+artifacts/correlations and the matrices are cached in memory per version.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data
+import schema
+
+CORRELATION_DIR = data.BASE_DIR / 'artifacts' / 'correlations'
+
+_lock = threading.Lock()
+_matrices = {}  # (dataset version, method) -> matrix
+
+
+class Moments:
+    """Pairwise-complete co-moments of a set of columns."""
+
+    def __init__(self, columns, n, sx, sxx, sxy):
+        self.columns = list(columns)
+        self.n = n      # n[i, j]: rows where columns i and j are both present
+        self.sx = sx    # sx[i, j]: sum of column i over those rows
+        self.sxx = sxx  # sxx[i, j]: sum of column i squared over those rows
+        self.sxy = sxy  # sxy[i, j]: sum of column i * column j
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        columns = columns or list(df.columns)
+        values = df[columns].to_numpy(dtype='float64', na_value=np.nan)
+        present = (~np.isnan(values)).astype('float64')
+        values = np.nan_to_num(values)
+        return cls(columns,
+                   present.T @ present,
+                   values.T @ present,
+                   (values ** 2).T @ present,
+                   values.T @ values)
+
+    def __add__(self, other):
+        if self.columns != other.columns:
+            raise ValueError("Moments of different columns cannot be merged")
+        return Moments(self.columns, self.n + other.n, self.sx + other.sx,
+                       self.sxx + other.sxx, self.sxy + other.sxy)
+
+    def pearson(self):
+        n = self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = self.sxy - self.sx * self.sx.T / n
+            var_x = self.sxx - self.sx ** 2 / n
+            var_y = var_x.T
+            r = cov / np.sqrt(var_x * var_y)
+        return pd.DataFrame(np.clip(r, -1, 1), index=self.columns, columns=self.columns)
+
+
+def merge(*moments):
+    total = moments[0]
+    for m in moments[1:]:
+        total = total + m
+    return total
+
+
+def pearson(df, columns=None, chunksize=None):
+    """Pearson matrix of ``df``, accumulated over chunks of ``chunksize`` rows."""
+    if not chunksize:
+        return Moments.from_frame(df, columns).pearson()
+    chunks = [df.iloc[i:i + chunksize] for i in range(0, len(df), chunksize)]
+    return merge(*(Moments.from_frame(chunk, columns) for chunk in chunks)).pearson()
+
+
+def spearman(df, columns=None):
+    """Spearman matrix: Pearson on average ranks (missing values keep NaN ranks)."""
+    columns = columns or list(df.columns)
+    return Moments.from_frame(df[columns].rank(), columns).pearson()
+
+
+def moments_path(version):
+    return CORRELATION_DIR / f'{version[:16]}.npz'
+
+
+def save(moments, version):
+    CORRELATION_DIR.mkdir(parents=True, exist_ok=True)
+    path = moments_path(version)
+    np.savez(path, columns=np.array(moments.columns), n=moments.n, sx=moments.sx,
+             sxx=moments.sxx, sxy=moments.sxy)
+    return path
+
+
+def load_moments():
+    """Moments of the numeric columns of the current cleaned dataset."""
+    version = data.dataset_version('cleaned')
+    path = moments_path(version)
+    if path.exists():
+        with np.load(path) as f:
+            return Moments(f['columns'].tolist(), f['n'], f['sx'], f['sxx'], f['sxy'])
+    columns = schema.numeric_columns()
+    moments = Moments.from_frame(data.load_cleaned(columns), columns)
+    save(moments, version)
+    return moments
+
+
+def build_moments(df):
+    """Moments of the numeric columns of a batch (for ingest.py)."""
+    return Moments.from_frame(df, schema.numeric_columns())
+
+
+def load_matrix(method='pearson'):
+    """Pearson (from the stored moments) or Spearman matrix of the current cleaned dataset."""
+    version = data.dataset_version('cleaned')
+    with _lock:
+        if (version, method) not in _matrices:
+            if method == 'spearman':
+                matrix = spearman(data.load_cleaned(schema.numeric_columns()))
+            else:
+                matrix = load_moments().pearson()
+            _matrices[(version, method)] = matrix
+        return _matrices[(version, method)]
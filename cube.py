@@ -0,0 +1,123 @@
+"""Precomputed group summaries for the Multivariate Analysis page.
+
+For every dimension (age group, gender, car type, ...) and every value of it,
+the cube holds the row count and the count, sum and sum of squares of each
+measure. Means and standard deviations follow from those, and two cubes merge
+by adding them up, so a cube for new rows can be folded into an existing one.
+
+The cube for the current dataset version is built in one pass over the
+columns it needs and stored under artifacts/cubes.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data
+from schema import flag_labels
+
+CUBE_DIR = data.BASE_DIR / 'artifacts' / 'cubes'
+
+AGE_BINS = [0, 30, 40, 50, 60, 100]
+AGE_LABELS = ['18-30', '31-40', '41-50', '51-60', '60+']
+TENURE_BINS = [0, 5, 10, 15, 20]
+TENURE_LABELS = ['0-5 years', '6-10 years', '11-15 years', '15+ years']
+
+DIMENSIONS = ['age_group', 'gender', 'car_type', 'education', 'mstatus', 'car_use', 'job_tenure_group']
+MEASURES = ['clm_amt', 'clm_freq', 'income']
+COLUMNS = ['age', 'yoj', 'gender', 'car_type', 'education', 'mstatus', 'car_use'] + MEASURES
+
+_lock = threading.Lock()
+_cubes = {}  # dataset version -> cube
+
+
+def derive_groups(df):
+    """The dimension columns of ``df`` as categoricals, including the binned groups."""
+    groups = {
+        'age_group': pd.cut(df['age'], bins=AGE_BINS, labels=AGE_LABELS),
+        'job_tenure_group': pd.cut(df['yoj'], bins=TENURE_BINS, labels=TENURE_LABELS),
+        'mstatus': pd.Categorical(flag_labels(df['mstatus']), categories=['No', 'Yes']),
+    }
+    for dim in DIMENSIONS:
+        if dim not in groups:
+            groups[dim] = df[dim].astype('category')
+    return {dim: pd.Series(groups[dim], index=df.index) for dim in DIMENSIONS}
+
+
+def build(df):
+    """Compute the cube of ``df`` in one pass over its measures."""
+    values = df[MEASURES].to_numpy(dtype='float64')
+    present = ~np.isnan(values)
+    values = np.where(present, values, 0.0)
+    # rows, then count / sum / sum of squares of every measure
+    stats = np.column_stack([np.ones(len(df)), present, values, values ** 2])
+
+    parts = []
+    for dim, groups in derive_groups(df).items():
+        codes = groups.cat.codes.to_numpy()
+        n_values = len(groups.cat.categories)
+        valid = codes >= 0
+        totals = np.stack([np.bincount(codes[valid], weights=col[valid], minlength=n_values)
+                           for col in stats.T], axis=1)
+        part = pd.DataFrame(totals, columns=_stat_columns())
+        part.insert(0, 'value', groups.cat.categories.astype(str))
+        part.insert(0, 'dimension', dim)
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _stat_columns():
+    return (['rows']
+            + [f'{m}_count' for m in MEASURES]
+            + [f'{m}_sum' for m in MEASURES]
+            + [f'{m}_sumsq' for m in MEASURES])
+
+
+def merge(*cubes):
+    """Add cubes together (e.g. the stored cube and the cube of a new batch)."""
+    merged = pd.concat(cubes, ignore_index=True)
+    # Keep the first-seen value order, which follows the category order
+    return merged.groupby(['dimension', 'value'], sort=False, as_index=False).sum()
+
+
+def summary(cube, dimension):
+    """Rows, mean and std of every measure per value of one dimension."""
+    part = cube[cube['dimension'] == dimension].set_index('value')
+    result = pd.DataFrame({'rows': part['rows'].astype('int64')}, index=part.index)
+    for m in MEASURES:
+        n = part[f'{m}_count']
+        mean = part[f'{m}_sum'] / n
+        var = (part[f'{m}_sumsq'] - n * mean ** 2) / (n - 1)
+        result[f'{m}_count'] = n.astype('int64')
+        result[f'{m}_mean'] = mean
+        result[f'{m}_std'] = np.sqrt(var.clip(lower=0))
+    # Values with no rows (e.g. an empty age band) are not shown
+    return result[result['rows'] > 0]
+
+
+def cube_path(version):
+    return CUBE_DIR / f'{version[:16]}.parquet'
+
+
+def load_cube():
+    """The cube of the current cleaned dataset, built and stored on first use."""
+    version = data.dataset_version('cleaned')
+    with _lock:
+        if version in _cubes:
+            return _cubes[version]
+        path = cube_path(version)
+        if path.exists():
+            cube = pd.read_parquet(path)
+        else:
+            cube = build(data.load_cleaned(COLUMNS))
+            save(cube, version)
+        _cubes[version] = cube
+        return cube
+
+
+def save(cube, version):
+    CUBE_DIR.mkdir(parents=True, exist_ok=True)
+    path = cube_path(version)
+    cube.to_parquet(path, index=False)
+    return path
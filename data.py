@@ -0,0 +1,204 @@
+"""Shared data access for Home.py and the pages.
+
+Every Streamlit rerun used to re-parse the CSV files. The loaders below parse
+each file once per process and hand the same columns to every session. A
+cached dataset is replaced automatically when its file changes on disk (new
+mtime/size and a different content hash).
+
+When an up-to-date Parquet copy exists (see columnar.py) it is read instead of
+the CSV, memory-mapped and one column at a time, so asking for
+``load_cleaned(['age', 'clm_amt'])`` never reads the other columns.
+
+The cleaned dataset also includes the batches added with ingest.py, stored as
+Parquet partitions under store/. Adding a partition changes the dataset
+version but the base file's columns stay cached.
+
+Columns are held in compact types: categoricals, booleans, narrow (nullable)
+integers, and float32 for measures whose values it holds exactly. ``python
+data.py`` reports the bytes per row against pandas' default dtypes.
+
+The returned frames share their data between sessions: treat them as
+read-only and work on a copy (or on derived Series) when a page needs extra
+columns.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+import columnar
+import schema
+
+# Slices of the shared frames must never write back into them
+pd.set_option("mode.copy_on_write", True)
+
+BASE_DIR = Path(__file__).resolve().parent
+CLEANED_CSV = BASE_DIR / "cleaned_df.csv"
+RAW_CSV = BASE_DIR / "car_insurance_claim.csv"
+CLEANED_PARQUET = BASE_DIR / "cleaned_df.parquet"
+RAW_PARQUET = BASE_DIR / "car_insurance_claim.parquet"
+STORE_DIR = BASE_DIR / "store"
+PARTITION_GLOB = "ingest_date=*/part-*.parquet"
+
+_lock = threading.Lock()
+_hashes = {}    # path -> (mtime_ns, size, sha256)
+_datasets = {}  # kind -> _Dataset
+
+
+def file_version(path):
+    """Return the sha256 of a file, re-hashing only when its mtime/size change."""
+    path = Path(path)
+    stat = os.stat(path)
+    key = str(path)
+    cached = _hashes.get(key)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    version = digest.hexdigest()
+    _hashes[key] = (stat.st_mtime_ns, stat.st_size, version)
+    return version
+
+
+def read_csv(path, kind):
+    """Parse a CSV and apply the cleaned or raw schema."""
+    if kind == "cleaned":
+        return schema.apply_cleaned(pd.read_csv(path, index_col=0))
+    return schema.apply_raw(pd.read_csv(path, encoding="utf-8-sig"))
+
+
+class _Part:
+    """Columns of one file of a dataset, filled in as they are requested."""
+
+    def __init__(self, path, kind):
+        self.path = path
+        if path.suffix == ".parquet":
+            self.names = columnar.column_names(path)
+            self.n_rows = columnar.row_count(path)
+            self.columns = {}
+        else:
+            df = read_csv(path, kind)
+            self.names = list(df.columns)
+            self.n_rows = len(df)
+            self.columns = {col: df[col] for col in df.columns}
+
+    def read(self, columns):
+        missing = [col for col in columns if col not in self.columns]
+        if missing:
+            frame = columnar.read(self.path, missing)
+            self.columns.update({col: frame[col] for col in missing})
+        return [self.columns[col] for col in columns]
+
+
+class _Dataset:
+    """One version of a dataset: its files and the columns assembled from them."""
+
+    def __init__(self, parts, version):
+        self.parts = parts
+        self.version = version
+        self.names = parts[0].names
+        self.index = pd.RangeIndex(sum(part.n_rows for part in parts))
+        self.columns = {}
+
+
+def source_path(kind):
+    """The file backing a dataset: its Parquet copy while that is current, else the CSV."""
+    csv, parquet = (CLEANED_CSV, CLEANED_PARQUET) if kind == "cleaned" else (RAW_CSV, RAW_PARQUET)
+    if parquet.exists():
+        if not csv.exists() or columnar.source_version(parquet) == file_version(csv):
+            return parquet
+    return csv
+
+
+def partition_paths():
+    """Ingested partitions of the cleaned dataset, oldest first (see ingest.py)."""
+    return sorted(STORE_DIR.glob(PARTITION_GLOB))
+
+
+def source_paths(kind):
+    """Every file of a dataset: the base file, then (cleaned only) the ingested partitions."""
+    paths = [source_path(kind)]
+    if kind == "cleaned":
+        paths += partition_paths()
+    return paths
+
+
+def combine_versions(versions):
+    """Version of a dataset made of several files; a single file keeps its own hash."""
+    if len(versions) == 1:
+        return versions[0]
+    return hashlib.sha256("\n".join(versions).encode()).hexdigest()
+
+
+def dataset_version(kind="cleaned"):
+    """Content hash of the files currently backing the cleaned or raw dataset."""
+    return combine_versions([file_version(path) for path in source_paths(kind)])
+
+
+def _load(kind, columns):
+    with _lock:
+        paths = source_paths(kind)
+        version = combine_versions([file_version(path) for path in paths])
+        dataset = _datasets.get(kind)
+        if dataset is None or dataset.version != version:
+            # Files that did not change (e.g. the base file after an ingest) keep their columns
+            old_parts = {part.path: part for part in dataset.parts} if dataset else {}
+            parts = [old_parts.get(path) or _Part(path, kind) for path in paths]
+            dataset = _Dataset(parts, version)
+            _datasets[kind] = dataset
+
+        columns = dataset.names if columns is None else list(columns)
+        for col in columns:
+            if col not in dataset.columns:
+                pieces = [part.read([col])[0] for part in dataset.parts]
+                series = pieces[0] if len(pieces) == 1 else pd.concat(pieces)
+                dataset.columns[col] = schema.compact(series.set_axis(dataset.index))
+
+    return pd.DataFrame({col: dataset.columns[col] for col in columns}, index=dataset.index)
+
+
+def load_cleaned(columns=None):
+    """The cleaned dataset used by Home.py and the analysis pages."""
+    return _load("cleaned", columns)
+
+
+def load_raw(columns=None):
+    """The raw claims extract, as shipped."""
+    return _load("raw", columns)
+
+
+def memory_report(kind="cleaned"):
+    """Bytes per row of every column as loaded, next to pandas' defaults for the CSV."""
+    csv = CLEANED_CSV if kind == "cleaned" else RAW_CSV
+    default = pd.read_csv(csv, index_col=0) if kind == "cleaned" else pd.read_csv(csv, encoding="utf-8-sig")
+    loaded = _load(kind, None)
+    report = pd.DataFrame({
+        "default_dtype": default.dtypes.astype(str),
+        "default_bytes_per_row": default.memory_usage(deep=True, index=False) / len(default),
+        "dtype": loaded.dtypes.astype(str),
+        "bytes_per_row": loaded.memory_usage(deep=True, index=False) / len(loaded),
+    })
+    report.loc["total"] = ["", report["default_bytes_per_row"].sum(), "", report["bytes_per_row"].sum()]
+    return report
+
+
+def clear_cache():
+    """Drop every cached dataset (the next load re-reads from disk)."""
+    with _lock:
+        _hashes.clear()
+        _datasets.clear()
+
+
+if __name__ == "__main__":
+    for kind in ("cleaned", "raw"):
+        report = memory_report(kind)
+        total = report.loc["total"]
+        print(f"{kind}: {total['bytes_per_row']:.1f} bytes per row "
+              f"({total['default_bytes_per_row']:.1f} with pandas' default dtypes)")
+        print(report.round(2).to_string(), end="\n\n")
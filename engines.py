@@ -0,0 +1,520 @@
+"""Interchangeable query engines for the aggregations behind the pages.
+
+    python engines.py --check              # every engine against the pandas engine
+    python engines.py --time               # time the page workload on each engine
+    APP_ENGINE=duckdb streamlit run Home.py
+
+An engine answers the questions the pages ask of a (filtered) set of rows:
+group summaries per dimension (as ``cube.summary``), value counts,
+describe() statistics, Pearson/Spearman matrices and row counts.
+
+- ``pandas``: the reference; loads the columns (data.py) and reuses
+  cube.py, column_stats.py and correlation.py on the filtered frame.
+- ``duckdb``: one SQL query per question over ``read_parquet`` of the
+  dataset files, on all cores.
+- ``polars``: one lazy query per question over ``scan_parquet``.
+
+DuckDB and Polars read only the columns a query uses and push the filters
+down to the Parquet scan, so they never materialize the dataset; they need
+the Parquet copy of the cleaned dataset (columnar.py). Both are optional
+installs (``pip install duckdb polars``); the CLI skips the missing ones.
+
+A selection is the tuple ``filters.normalize`` builds: ``(column, values)``
+for value filters and ``(column, Between(low, high))`` for ranges, both ends
+included. Results are the same for every engine up to floating-point
+rounding (``--check``, tests/test_engines.py); the pages use the engine named by ``APP_ENGINE``
+(default pandas) for filtered segments.
+"""
+
+import abc
+import argparse
+import importlib.util
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import column_stats
+import columnar
+import correlation
+import cube
+import data
+import schema
+
+ENGINE_VAR = 'APP_ENGINE'
+DEFAULT_ENGINE = 'pandas'
+QUARTILES = (0.25, 0.5, 0.75)
+
+Between = namedtuple('Between', 'low high')
+
+_lock = threading.Lock()
+_engines = {}  # (engine name, dataset version) -> Engine, for the current dataset version only
+
+
+def dimension_order(dimension):
+    """The values of a cube dimension in display order."""
+    if dimension == 'age_group':
+        return cube.AGE_LABELS
+    if dimension == 'job_tenure_group':
+        return cube.TENURE_LABELS
+    if dimension == 'mstatus':
+        return ['No', 'Yes']
+    return schema.CATEGORIES[dimension]
+
+
+def _bins(dimension):
+    # pd.cut's right-closed intervals: (low, high] -> label
+    if dimension == 'age_group':
+        return 'age', cube.AGE_BINS, cube.AGE_LABELS
+    return 'yoj', cube.TENURE_BINS, cube.TENURE_LABELS
+
+
+def _summary_frame(groups, dimension):
+    """Order a per-value summary like ``cube.summary`` and drop values without rows."""
+    groups = groups.dropna(subset=['value']).set_index('value')
+    result = groups.reindex([v for v in dimension_order(dimension) if v in groups.index])
+    result.index.name = 'value'
+    result['rows'] = result['rows'].astype('int64')
+    for m in cube.MEASURES:
+        result[f'{m}_count'] = result[f'{m}_count'].astype('int64')
+    return result[['rows'] + [f'{m}_{stat}' for m in cube.MEASURES for stat in ('count', 'mean', 'std')]]
+
+
+def _counts_series(counts, column):
+    """Value counts ordered like pandas': most frequent first, zero counts for unseen categories."""
+    counts = counts.dropna(subset=['value'])
+    series = pd.Series(counts['count'].to_numpy(dtype='int64'), index=counts['value'].tolist())
+    if column in schema.CATEGORIES:
+        series = series.reindex(schema.CATEGORIES[column], fill_value=0)
+    order = np.argsort(-series.to_numpy(), kind='stable')
+    result = series.iloc[order]
+    result.index.name = column
+    return result.rename('count')
+
+
+def _pairs_frame(values, pairs, columns):
+    """Symmetric matrix from the values of the (i, j) pairs with i <= j."""
+    matrix = np.full((len(columns), len(columns)), np.nan)
+    for value, (i, j) in zip(values, pairs):
+        matrix[i, j] = matrix[j, i] = value
+    return pd.DataFrame(np.clip(matrix, -1, 1), index=columns, columns=columns)
+
+
+def _describe_frame(values, columns):
+    """describe() rows plus sum and zeros, one column per data column."""
+    rows = column_stats.DESCRIBE_ROWS + ['sum', 'zeros']
+    return pd.DataFrame(np.asarray(values, dtype='float64').reshape(len(rows), len(columns)),
+                        index=rows, columns=columns)
+
+
+def mask(df, selection):
+    """Boolean array of the rows of ``df`` that match a selection."""
+    result = np.ones(len(df), dtype=bool)
+    for col, chosen in selection:
+        if isinstance(chosen, Between):
+            result &= df[col].between(chosen.low, chosen.high).to_numpy(dtype=bool, na_value=False)
+        else:
+            result &= df[col].isin(chosen).to_numpy(dtype=bool, na_value=False)
+    return result
+
+
+class Engine(abc.ABC):
+    """Aggregations over the cleaned dataset files (``paths``)."""
+
+    name = None
+    package = None  # optional package the engine needs (not in requirements.txt)
+
+    def __init__(self, paths=None):
+        self.paths = list(paths or data.source_paths('cleaned'))
+
+    @abc.abstractmethod
+    def summary(self, dimension, selection=()):
+        """``cube.summary(cube, dimension)`` of the selected rows."""
+
+    @abc.abstractmethod
+    def value_counts(self, column, selection=()):
+        """Counts of the present values of ``column``, most frequent first."""
+
+    @abc.abstractmethod
+    def describe(self, columns, selection=()):
+        """The describe() table of the numeric ``columns`` (``column_stats.compute``)."""
+
+    @abc.abstractmethod
+    def correlation(self, columns, method='pearson', selection=()):
+        """Pearson or Spearman matrix of ``columns`` over pairwise-complete rows."""
+
+    @abc.abstractmethod
+    def count(self, selection=()):
+        """Number of selected rows."""
+
+    def _require_parquet(self):
+        csv = [path for path in self.paths if path.suffix != '.parquet']
+        if csv:
+            raise ValueError(f"The {self.name} engine reads Parquet; convert {csv[0].name} with "
+                             "`python columnar.py` first")
+
+
+class PandasEngine(Engine):
+    """Loads the columns into memory and filters them with boolean masks."""
+
+    name = 'pandas'
+
+    def rows(self, columns, selection=()):
+        columns = list(dict.fromkeys(list(columns) + [col for col, _ in selection]))
+        if self.paths == data.source_paths('cleaned'):
+            df = data.load_cleaned(columns)
+        else:
+            df = pd.concat([columnar.read(path, columns) for path in self.paths], ignore_index=True)
+        return df[mask(df, selection)]
+
+    def summary(self, dimension, selection=()):
+        return cube.summary(cube.build(self.rows(cube.COLUMNS, selection)), dimension)
+
+    def value_counts(self, column, selection=()):
+        return self.rows([column], selection)[column].value_counts()
+
+    def describe(self, columns, selection=()):
+        return column_stats.compute(self.rows(columns, selection), list(columns), nbins=()).table
+
+    def correlation(self, columns, method='pearson', selection=()):
+        df = self.rows(columns, selection)
+        return correlation.spearman(df, list(columns)) if method == 'spearman' else correlation.pearson(df, list(columns))
+
+    def count(self, selection=()):
+        return len(self.rows([], selection))
+
+
+def _sql_name(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+class DuckDBEngine(Engine):
+    """SQL over ``read_parquet`` of the dataset files."""
+
+    name = 'duckdb'
+    package = 'duckdb'
+
+    def __init__(self, paths=None, threads=None):
+        import duckdb
+
+        super().__init__(paths)
+        self._require_parquet()
+        self.connection = duckdb.connect()
+        self.connection.execute(f"SET threads TO {threads or os.cpu_count()}")
+        files = ', '.join("'" + str(path).replace("'", "''") + "'" for path in self.paths)
+        self.source = f"read_parquet([{files}], union_by_name = true)"
+
+    def _where(self, selection):
+        where, params = [], []
+        for col, chosen in selection:
+            if isinstance(chosen, Between):
+                where.append(f"{_sql_name(col)} BETWEEN ? AND ?")
+                params += [chosen.low, chosen.high]
+            else:
+                where.append(f"{_sql_name(col)} IN ({', '.join('?' * len(chosen))})")
+                params += [value.item() if isinstance(value, np.generic) else value for value in chosen]
+        return (" WHERE " + " AND ".join(where) if where else ""), params
+
+    def _run(self, sql, params):
+        # A cursor per query: sessions run in their own threads
+        return self.connection.cursor().execute(sql, params).df()
+
+    def query(self, select, selection=(), group_by=None):
+        where, params = self._where(selection)
+        sql = f"SELECT {select} FROM {self.source}{where}"
+        if group_by:
+            sql += f" GROUP BY {group_by}"
+        return self._run(sql, params)
+
+    def _dimension(self, dimension):
+        if dimension in ('age_group', 'job_tenure_group'):
+            column, bins, labels = _bins(dimension)
+            col = _sql_name(column)
+            cases = ' '.join(f"WHEN {col} > {low} AND {col} <= {high} THEN '{label}'"
+                             for low, high, label in zip(bins[:-1], bins[1:], labels))
+            return f"CASE {cases} END"
+        if dimension == 'mstatus':
+            return "CASE WHEN mstatus THEN 'Yes' WHEN NOT mstatus THEN 'No' END"
+        return f"CAST({_sql_name(dimension)} AS VARCHAR)"
+
+    def summary(self, dimension, selection=()):
+        stats = ', '.join(f"count({m}) AS {m}_count, avg({m}) AS {m}_mean, stddev_samp({m}) AS {m}_std"
+                          for m in cube.MEASURES)
+        groups = self.query(f"{self._dimension(dimension)} AS value, count(*) AS rows, {stats}",
+                            selection, group_by='value')
+        return _summary_frame(groups, dimension)
+
+    def value_counts(self, column, selection=()):
+        col = _sql_name(column)
+        return _counts_series(self.query(f"{col} AS value, count(*) AS count", selection, group_by=col), column)
+
+    def describe(self, columns, selection=()):
+        exprs = []
+        for column in columns:
+            col = f"CAST({_sql_name(column)} AS DOUBLE)"
+            # The three quartiles from one sort per column, as a list
+            exprs.append(f"count({col}), avg({col}), stddev_samp({col}), min({col}), "
+                         f"quantile_cont({col}, [{', '.join(map(str, QUARTILES))}]), "
+                         f"max({col}), coalesce(sum({col}), 0), coalesce(count_if({col} = 0), 0)")
+        row = self.query(', '.join(exprs), selection).iloc[0].tolist()
+        values = []
+        for k in range(0, len(row), 8):
+            quartiles = row[k + 4] if isinstance(row[k + 4], (list, np.ndarray)) else [np.nan] * len(QUARTILES)
+            values.append(row[k:k + 4] + list(quartiles) + row[k + 5:k + 8])
+        return _describe_frame(pd.DataFrame(values).to_numpy(dtype='float64', na_value=np.nan).T, columns)
+
+    def correlation(self, columns, method='pearson', selection=()):
+        columns = list(columns)
+        cols = [_sql_name(col) for col in columns]
+        where, params = self._where(selection)
+        ctes = [f"rows AS (SELECT {', '.join(cols)} FROM {self.source}{where})"]
+        if method == 'spearman':
+            # Average rank of every distinct value among the selected rows (a small table per
+            # column), joined back to the rows; missing values get no rank
+            for i, col in enumerate(cols):
+                ctes.append(f"ranks{i} AS (SELECT value, sum(n) OVER (ORDER BY value) - (n - 1) / 2.0 AS rank "
+                            f"FROM (SELECT {col} AS value, count(*) AS n FROM rows WHERE {col} IS NOT NULL "
+                            f"GROUP BY value))")
+            values = ', '.join(f"ranks{i}.rank AS c{i}" for i in range(len(cols)))
+            joins = ''.join(f" LEFT JOIN ranks{i} ON rows.{col} = ranks{i}.value" for i, col in enumerate(cols))
+        else:
+            values = ', '.join(f"CAST({col} AS DOUBLE) AS c{i}" for i, col in enumerate(cols))
+            joins = ''
+        # corr() skips the rows where either value is missing: pairwise-complete, like pandas
+        pairs = [(i, j) for i in range(len(cols)) for j in range(i, len(cols))]
+        result = self._run(
+            f"WITH {', '.join(ctes)} SELECT {', '.join(f'corr(c{i}, c{j})' for i, j in pairs)} "
+            f"FROM (SELECT {values} FROM rows{joins})", params)
+        return _pairs_frame(result.iloc[0].to_numpy(dtype='float64', na_value=np.nan), pairs, columns)
+
+    def count(self, selection=()):
+        return int(self.query("count(*) AS rows", selection)['rows'].iloc[0])
+
+
+class PolarsEngine(Engine):
+    """Lazy queries over ``scan_parquet`` of the dataset files."""
+
+    name = 'polars'
+    package = 'polars'
+
+    def __init__(self, paths=None):
+        super().__init__(paths)
+        self._require_parquet()
+
+    def frame(self, selection=()):
+        import polars as pl
+
+        frame = pl.scan_parquet([str(path) for path in self.paths])
+        for col, chosen in selection:
+            if isinstance(chosen, Between):
+                frame = frame.filter(pl.col(col).is_between(chosen.low, chosen.high))
+            else:
+                values = [value.item() if isinstance(value, np.generic) else value for value in chosen]
+                column = pl.col(col).cast(pl.String) if col in schema.CATEGORIES else pl.col(col)
+                frame = frame.filter(column.is_in(values))
+        return frame
+
+    def _dimension(self, dimension):
+        import polars as pl
+
+        if dimension in ('age_group', 'job_tenure_group'):
+            column, bins, labels = _bins(dimension)
+            expr = pl.when((pl.col(column) > bins[0]) & (pl.col(column) <= bins[1])).then(pl.lit(labels[0]))
+            for low, high, label in zip(bins[1:-1], bins[2:], labels[1:]):
+                expr = expr.when((pl.col(column) > low) & (pl.col(column) <= high)).then(pl.lit(label))
+            return expr.otherwise(None)
+        if dimension == 'mstatus':
+            return pl.when(pl.col('mstatus')).then(pl.lit('Yes')).when(~pl.col('mstatus')).then(pl.lit('No'))
+        return pl.col(dimension).cast(pl.String)
+
+    def summary(self, dimension, selection=()):
+        import polars as pl
+
+        stats = []
+        for m in cube.MEASURES:
+            stats += [pl.col(m).count().alias(f'{m}_count'), pl.col(m).mean().alias(f'{m}_mean'),
+                      pl.col(m).std().alias(f'{m}_std')]
+        groups = (self.frame(selection).group_by(self._dimension(dimension).alias('value'))
+                  .agg(pl.len().alias('rows'), *stats).collect())
+        return _summary_frame(groups.to_pandas(), dimension)
+
+    def value_counts(self, column, selection=()):
+        import polars as pl
+
+        counts = (self.frame(selection).group_by(pl.col(column).alias('value'))
+                  .agg(pl.len().alias('count')).collect())
+        if column in schema.CATEGORIES:
+            counts = counts.with_columns(pl.col('value').cast(pl.String))
+        return _counts_series(counts.to_pandas(), column)
+
+    def describe(self, columns, selection=()):
+        import polars as pl
+
+        exprs = []
+        for column in columns:
+            col = pl.col(column).cast(pl.Float64)
+            exprs += [col.count(), col.mean(), col.std(), col.min()]
+            exprs += [col.quantile(q, interpolation='linear') for q in QUARTILES]
+            exprs += [col.max(), col.sum(), (col == 0).sum()]
+        exprs = [expr.cast(pl.Float64).alias(str(k)) for k, expr in enumerate(exprs)]
+        values = self.frame(selection).select(exprs).collect().to_numpy()[0].astype('float64')
+        return _describe_frame(values.reshape(len(columns), -1).T, columns)
+
+    def correlation(self, columns, method='pearson', selection=()):
+        import polars as pl
+
+        columns = list(columns)
+        if method == 'spearman':
+            # Average ranks among the selected rows; missing values stay missing
+            values = [pl.col(col).cast(pl.Float64).rank('average').cast(pl.Float64) for col in columns]
+        else:
+            values = [pl.col(col).cast(pl.Float64) for col in columns]
+        pairs = [(i, j) for i in range(len(columns)) for j in range(i, len(columns))]
+        names = [f"c{i}" for i in range(len(columns))]
+        # Pairwise-complete, like pandas: each pair only uses the rows where both are present
+        exprs = []
+        for k, (i, j) in enumerate(pairs):
+            both = pl.col(names[i]).is_not_null() & pl.col(names[j]).is_not_null()
+            exprs.append(pl.corr(pl.col(names[i]).filter(both), pl.col(names[j]).filter(both)).alias(str(k)))
+        result = (self.frame(selection).select([v.alias(n) for v, n in zip(values, names)])
+                  .select(exprs).collect())
+        return _pairs_frame(result.to_numpy()[0].astype('float64'), pairs, columns)
+
+    def count(self, selection=()):
+        import polars as pl
+
+        return int(self.frame(selection).select(pl.len()).collect().item())
+
+
+ENGINES = {engine.name: engine for engine in (PandasEngine, DuckDBEngine, PolarsEngine)}
+
+
+def available():
+    """Names of the engines whose packages are installed."""
+    return [name for name, engine in ENGINES.items()
+            if engine.package is None or importlib.util.find_spec(engine.package) is not None]
+
+
+def get(name=None, paths=None):
+    """An engine by name (default: ``APP_ENGINE``), one per dataset version."""
+    name = name or os.environ.get(ENGINE_VAR, DEFAULT_ENGINE)
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine {name!r}; choose one of {', '.join(ENGINES)}")
+    if paths is not None:
+        return ENGINES[name](paths)
+    version = data.dataset_version('cleaned')
+    key = (name, version)
+    with _lock:
+        if key not in _engines:
+            # Engines of earlier versions read files that have since changed
+            for stale in [k for k in _engines if k[1] != version]:
+                del _engines[stale]
+            _engines[key] = ENGINES[name]()
+        return _engines[key]
+
+
+# The questions the pages ask of a segment
+
+def workload(engine, selection=()):
+    """Every aggregation the pages run for one segment, by name."""
+    numeric = schema.numeric_columns()
+    results = {'count': engine.count(selection), 'describe': engine.describe(numeric, selection)}
+    for dimension in cube.DIMENSIONS:
+        results[f'summary {dimension}'] = engine.summary(dimension, selection)
+    for column in schema.categorical_columns():
+        results[f'value_counts {column}'] = engine.value_counts(column, selection)
+    for method in ('pearson', 'spearman'):
+        results[f'correlation {method}'] = engine.correlation(numeric, method, selection)
+    return results
+
+
+SELECTIONS = [
+    (),
+    (('car_type', ('SUV', 'Sports Car')),),
+    (('age', Between(30, 45)), ('urbanicity', ('Highly Urban/ Urban',)), ('claim_flag', (1,))),
+    (('gender', ('F',)), ('car_use', ('Commercial',)), ('Customer_Loyalty', ('New Customer',))),
+]
+
+
+def same(expected, actual, rtol=1e-6):
+    """Whether two workload results agree up to floating-point rounding."""
+    if np.ndim(expected) == 0:
+        return expected == actual
+    if isinstance(expected, pd.Series):
+        # Ties can come in either order; counts must match value by value
+        expected, actual = (series.set_axis(series.index.astype(str)).sort_index() for series in (expected, actual))
+        if list(expected.index) != list(actual.index):
+            return False
+    elif (list(map(str, expected.index)) != list(map(str, actual.index))
+          or list(expected.columns) != list(actual.columns)):
+        return False
+    return np.allclose(expected.to_numpy(dtype='float64'), actual.to_numpy(dtype='float64'),
+                       rtol=rtol, atol=1e-9, equal_nan=True)
+
+
+def check(names, paths=None, rtol=1e-6):
+    """Compare the workload of every engine with the pandas engine; returns the mismatches."""
+    reference = get('pandas', paths)
+    mismatches = []
+    for selection in SELECTIONS:
+        expected = workload(reference, selection)
+        for name in names:
+            actual = workload(get(name, paths), selection)
+            for key, value in expected.items():
+                if not same(value, actual[key], rtol):
+                    mismatches.append((name, selection, key))
+                    print(f"MISMATCH {name}: {key} for {selection or 'all rows'}")
+    return mismatches
+
+
+def timings(names, paths=None, repeat=3):
+    """Best-of-``repeat`` seconds of the workload per engine and selection."""
+    result = {}
+    for name in names:
+        engine = get(name, paths)
+        for selection in SELECTIONS:
+            best = np.inf
+            for _ in range(repeat):
+                start = time.perf_counter()
+                workload(engine, selection)
+                best = min(best, time.perf_counter() - start)
+            result[(name, len(selection))] = best
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--check', action='store_true', help='compare every engine with the pandas engine')
+    parser.add_argument('--time', action='store_true', help='time the page workload on each engine')
+    parser.add_argument('--engines', nargs='+', default=None, choices=list(ENGINES),
+                        help='engines to run (default: the installed ones)')
+    parser.add_argument('--data', nargs='+', default=None, help='Parquet files (default: the cleaned dataset)')
+    args = parser.parse_args()
+    paths = None if args.data is None else [Path(path) for path in args.data]
+    installed = available()
+    if args.engines is None:
+        args.engines = installed
+        skipped = [name for name in ENGINES if name not in installed]
+        if skipped:
+            print(f"Skipping {', '.join(skipped)} (not installed)")
+    missing = [name for name in args.engines if name not in installed]
+    if missing:
+        parser.error(f"{', '.join(missing)} not installed; pip install "
+                     + ' '.join(ENGINES[name].package for name in missing))
+
+    if args.check:
+        mismatches = check([name for name in args.engines if name != 'pandas'], paths)
+        print(f"{len(mismatches)} mismatches across {len(SELECTIONS)} selections")
+        if mismatches:
+            raise SystemExit(1)
+    if args.time or not args.check:
+        for (name, filters), seconds in timings(args.engines, paths).items():
+            print(f"{name:<8} {filters} filters {seconds:8.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""Content-addressed cache of the built page sections and their figure JSON.
+
+Building a section runs plotly express and serializing its figures is a
+large share of a page's render time. ``cached_section`` stores each built
+section with its figures already serialized to JSON, under a key made of:
+
+- the dataset version the scope was taken from,
+- the chart spec: the builder, its arguments and the code its figures and
+  numbers come from (SPEC_FILES: the modules of sections, filters, the
+  approximate answers and rendering, and every module of the repo they
+  import),
+- the active filters (the scope's selection, or its label).
+
+Entries live in two tiers: an in-process LRU bounded by the size of the
+figure JSON it holds, and pickles under artifacts/figures shared by every
+process, evicted oldest-used first once they take more than
+``APP_FIGURE_CACHE_MB`` (default 512; 0 turns the disk tier off). A repeat
+view by any user, including after a restart, skips figure construction and
+serialization; ``plotly_chart`` sends the stored JSON to the browser as is.
+
+    python figure_cache.py           # size of the disk tier
+    python figure_cache.py --clear
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+import data
+
+FIGURE_DIR = data.BASE_DIR / 'artifacts' / 'figures'
+MEMORY_BYTES = 64 * 2 ** 20
+DISK_MB_VAR = 'APP_FIGURE_CACHE_MB'
+DEFAULT_DISK_MB = 512
+# The modules pages build and render sections with; they and every module of the repo they import
+# make up the chart spec's code
+SPEC_ROOTS = ['sections.py', 'approx.py', 'filters.py', 'render.py']
+
+
+def _size(entry):
+    return sum(len(fig) for fig in entry.figures) + len(entry.insights)
+
+
+class FigureCache:
+    """Sections with serialized figures: an LRU memory tier over a size-bounded disk tier."""
+
+    def __init__(self, directory=FIGURE_DIR, memory_bytes=MEMORY_BYTES, disk_bytes=None):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        if disk_bytes is None:
+            disk_bytes = int(float(os.environ.get(DISK_MB_VAR, DEFAULT_DISK_MB)) * 2 ** 20)
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> entry, least recently used first
+        self._memory_used = 0
+        self._disk_used = None        # bytes under ``directory``, scanned on first write
+        self.hits = {'memory': 0, 'disk': 0, 'miss': 0}
+
+    def _path(self, key):
+        return self.directory / f'{key}.pkl'
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits['memory'] += 1
+                return self._memory[key]
+        entry = self._read(key)
+        with self._lock:
+            self.hits['disk' if entry is not None else 'miss'] += 1
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        self._remember(key, entry)
+        if self.disk_bytes > 0:
+            self._write(key, entry)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            if key in self._memory:
+                self._memory_used -= _size(self._memory.pop(key))
+            self._memory[key] = entry
+            self._memory_used += _size(entry)
+            while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= _size(evicted)
+
+    def _read(self, key):
+        path = self._path(key)
+        if self.disk_bytes <= 0 or not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # Evicted or being replaced by another process
+            return None
+        # Eviction goes by mtime, so a read counts as a use
+        os.utime(path)
+        return entry
+
+    def _write(self, key, entry):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_name(f'.{key}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        size = tmp.stat().st_size
+        os.replace(tmp, path)
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = self.disk_usage()
+            else:
+                self._disk_used += size
+            if self._disk_used > self.disk_bytes:
+                self._disk_used = self._evict()
+
+    def disk_usage(self):
+        return sum(path.stat().st_size for path in self.directory.glob('*.pkl'))
+
+    def _evict(self):
+        """Remove the least recently used files until the disk tier fits; returns its new size."""
+        files = []
+        for path in self.directory.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+        used = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if used <= self.disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            used -= size
+        return used
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+            self._disk_used = 0
+        for path in self.directory.glob('*.pkl'):
+            path.unlink(missing_ok=True)
+
+
+def _imported(path):
+    names = []
+    for node in ast.walk(ast.parse(path.read_text(), str(path))):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.append(node.module)
+    return {f"{name.split('.')[0]}.py" for name in names}
+
+
+def spec_files(roots=SPEC_ROOTS):
+    """``roots`` and the repo's modules they import, directly or not (also inside functions)."""
+    files, pending = set(), list(roots)
+    while pending:
+        name = pending.pop()
+        if name not in files and (data.BASE_DIR / name).exists():
+            files.add(name)
+            pending += _imported(data.BASE_DIR / name)
+    return sorted(files)
+
+
+SPEC_FILES = spec_files()
+_cache = FigureCache()
+_spec_lock = threading.Lock()
+
+
+def code_version():
+    """Hash of the files the figures are built by; editing them invalidates the cache."""
+    with _spec_lock:
+        return data.combine_versions([data.file_version(data.BASE_DIR / name) for name in SPEC_FILES])
+
+
+def cache_key(version, spec, filters):
+    text = json.dumps([version, code_version(), spec, filters], default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def cached_section(scope, build, *args):
+    """``build(scope, *args)`` with its figures as JSON, from the cache when present."""
+    key = cache_key(scope.version, [build.__name__, list(map(repr, args))], scope.filters)
+    entry = _cache.get(key)
+    if entry is None:
+        built = build(scope, *args)
+        entry = built._replace(figures=tuple(pio.to_json(fig, validate=False) for fig in built.figures))
+        _cache.put(key, entry)
+    return entry
+
+
+def stats():
+    """Hits per tier and the bytes held in memory and on disk."""
+    return dict(_cache.hits, memory_bytes=_cache._memory_used,
+                disk_bytes=_cache.disk_usage() if FIGURE_DIR.exists() else 0)
+
+
+# The Streamlit release the fast path below was written against (pinned in requirements.txt and
+# checked by tests/test_figure_cache.py); other versions use st.plotly_chart
+FAST_PATH_VERSIONS = ('1.44.1',)
+_fast_path = st.__version__ in FAST_PATH_VERSIONS
+
+
+def _send_spec(spec, use_container_width, theme):
+    # st.plotly_chart without re-validating and re-serializing the figure: the same
+    # element, built from the stored JSON (Streamlit 1.44.1 internals, see FAST_PATH_VERSIONS)
+    from streamlit.elements.lib.form_utils import current_form_id
+    from streamlit.elements.lib.utils import compute_and_register_element_id
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+
+    proto = PlotlyChartProto()
+    proto.use_container_width = use_container_width
+    proto.theme = theme or ""
+    proto.form_id = current_form_id(st._main)
+    proto.spec = spec
+    proto.config = json.dumps({'showLink': False, 'linkText': False})
+    proto.id = compute_and_register_element_id(
+        "plotly_chart", user_key=None, form_id=proto.form_id, plotly_spec=proto.spec,
+        plotly_config=proto.config, selection_mode=('points', 'box', 'lasso'),
+        is_selection_activated=False, theme=theme, use_container_width=use_container_width)
+    return st._main._enqueue("plotly_chart", proto)
+
+
+def plotly_chart(fig, use_container_width=False, theme='streamlit', **kwargs):
+    """``st.plotly_chart`` for a figure or for figure JSON from the cache."""
+    global _fast_path
+    if isinstance(fig, str) and not kwargs and _fast_path:
+        try:
+            return _send_spec(fig, use_container_width, theme)
+        except StreamlitAPIException:
+            # Misuse (e.g. a duplicate element) that st.plotly_chart would report too
+            raise
+        except Exception:
+            # The internals changed: send every later chart through the public API
+            _fast_path = False
+    if isinstance(fig, str):
+        fig = json.loads(fig)
+    return st.plotly_chart(fig, use_container_width=use_container_width, theme=theme, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clear', action='store_true', help='remove every cached section')
+    args = parser.parse_args()
+
+    if args.clear:
+        _cache.clear()
+    used = _cache.disk_usage() if FIGURE_DIR.exists() else 0
+    print(f"{FIGURE_DIR}: {used / 2 ** 20:,.1f} MB of {_cache.disk_bytes / 2 ** 20:,.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""Sidebar segment filters shared by all pages, resolved through bitmap indexes.
+
+For every filter column the index holds one packed bitmap (1 bit per row)
+per value, and for the age range the row positions sorted by age. A filter
+selection is resolved without touching the data columns: the bitmaps of the
+selected values of a column are OR-ed, the age range becomes a bitmap from
+one slice of the sorted positions, and the columns are AND-ed together.
+The index is built once per dataset version; a segment's Scope (and with
+it its cube, statistics and correlations) is kept for the last few
+selections, so reruns of an unchanged selection cost nothing.
+
+The selection is kept in ``st.session_state`` under ``segment_filters`` so
+it follows the user from page to page. The segment's Scope also carries the
+normalized selection, so a query engine (engines.py) can push the same
+filters down to the Parquet files.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+
+import data
+from engines import Between
+from sections import Scope
+
+VALUE_FILTERS = ['car_type', 'urbanicity', 'gender', 'car_use', 'Customer_Loyalty', 'claim_flag']
+RANGE_FILTERS = ['age']
+STATE_KEY = 'segment_filters'
+CACHED_SEGMENTS = 16
+
+_lock = threading.Lock()
+_indexes = {}                 # dataset version -> BitmapIndex
+_segments = OrderedDict()     # (dataset version, selection) -> Scope, least recently used first
+
+
+class BitmapIndex:
+    """Per-value bitmaps and sorted positions of the filter columns."""
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.values = {}   # column -> values in display order
+        self.bitmaps = {}  # (column, value) -> packed bitmap
+        for col in VALUE_FILTERS:
+            series = df[col].astype('category')
+            codes = series.cat.codes.to_numpy()
+            self.values[col] = list(series.cat.categories)
+            for code, value in enumerate(self.values[col]):
+                self.bitmaps[(col, value)] = np.packbits(codes == code)
+        self.sorted_positions = {}  # column -> row positions ordered by value
+        self.sorted_values = {}     # column -> the values in that order
+        for col in RANGE_FILTERS:
+            values = df[col].to_numpy(dtype='float64')
+            order = np.argsort(values, kind='stable')
+            self.sorted_positions[col] = order
+            self.sorted_values[col] = values[order]
+
+    def bounds(self, column):
+        values = self.sorted_values[column]
+        return values[0], values[np.searchsorted(values, np.inf) - 1]
+
+    def range_bitmap(self, column, low, high):
+        values = self.sorted_values[column]
+        start, stop = np.searchsorted(values, low, 'left'), np.searchsorted(values, high, 'right')
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.sorted_positions[column][start:stop]] = True
+        return np.packbits(mask)
+
+    def select(self, selection):
+        """Packed bitmap of the rows matching a selection (None: every row)."""
+        result = None
+        for col, chosen in selection:
+            if col in self.sorted_values:
+                bits = self.range_bitmap(col, *chosen)
+            else:
+                bits = np.bitwise_or.reduce([self.bitmaps[(col, value)] for value in chosen])
+            result = bits if result is None else result & bits
+        return result
+
+    def positions(self, bits):
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+
+def load_index():
+    """The bitmap index of the current cleaned dataset, built once per version."""
+    version = data.dataset_version('cleaned')
+    with _lock:
+        if version not in _indexes:
+            _indexes.clear()
+            _indexes[version] = BitmapIndex(data.load_cleaned(VALUE_FILTERS + RANGE_FILTERS))
+        return version, _indexes[version]
+
+
+def normalize(index, filters):
+    """The effective selection as a hashable tuple: filters that exclude nothing are dropped."""
+    selection = []
+    for col in RANGE_FILTERS:
+        if col in filters and tuple(filters[col]) != tuple(index.bounds(col)):
+            selection.append((col, Between(*filters[col])))
+    for col in VALUE_FILTERS:
+        chosen = [value for value in index.values[col] if value in set(filters.get(col, ()))]
+        if chosen and len(chosen) < len(index.values[col]):
+            selection.append((col, tuple(chosen)))
+    return tuple(selection)
+
+
+def describe(selection):
+    parts = []
+    for col, chosen in selection:
+        if col in RANGE_FILTERS:
+            parts.append(f"{col} {chosen[0]:g}-{chosen[1]:g}")
+        else:
+            parts.append(f"{col} in {', '.join(map(str, chosen))}")
+    return '; '.join(parts) or 'All customers'
+
+
+def segment_scope(filters):
+    """Scope of the rows matching ``filters`` ({column: values or (low, high)})."""
+    version, index = load_index()
+    selection = normalize(index, filters)
+    if not selection:
+        return Scope.current()
+    key = (version, selection)
+    with _lock:
+        if key in _segments:
+            _segments.move_to_end(key)
+            return _segments[key]
+    scope = Scope(positions=index.positions(index.select(selection)), label=describe(selection), selection=selection)
+    with _lock:
+        _segments[key] = scope
+        while len(_segments) > CACHED_SEGMENTS:
+            _segments.popitem(last=False)
+    return scope
+
+
+def _clear():
+    st.session_state[STATE_KEY] = {}
+    for col in RANGE_FILTERS + VALUE_FILTERS:
+        st.session_state.pop(f'_filter_{col}', None)
+
+
+def sidebar():
+    """Render the filters in the sidebar and return the Scope of the selected segment."""
+    _, index = load_index()
+    saved = st.session_state.setdefault(STATE_KEY, {})
+
+    st.sidebar.header("Segment")
+    st.sidebar.button("Clear filters", on_click=_clear)
+    low, high = (int(v) for v in index.bounds('age'))
+    # Widget values are dropped when another page runs, so they are restored from the saved selection
+    for col in RANGE_FILTERS + VALUE_FILTERS:
+        key = f'_filter_{col}'
+        if key not in st.session_state:
+            if col == 'age':
+                age = saved.get(col, (low, high))
+                st.session_state[key] = (max(age[0], low), min(age[1], high))
+            else:
+                st.session_state[key] = [v for v in saved.get(col, []) if v in index.values[col]]
+    st.sidebar.slider("Age", low, high, key='_filter_age')
+    for col in VALUE_FILTERS:
+        st.sidebar.multiselect(col, index.values[col], key=f'_filter_{col}', placeholder="All")
+    for col in RANGE_FILTERS + VALUE_FILTERS:
+        saved[col] = st.session_state[f'_filter_{col}']
+
+    scope = segment_scope(saved)
+    st.sidebar.caption(f"{scope.n_rows:,} of {index.n_rows:,} rows")
+    if scope.n_rows == 0:
+        st.warning("No customers match the selected filters.")
+        st.stop()
+    return scope
@@ -0,0 +1,114 @@
+"""Append a new claims batch to the cleaned dataset.
+
+    python ingest.py daily_extract.csv                   # partition for today
+    python ingest.py daily_extract.csv --date 2026-10-17
+
+The batch (shaped like car_insurance_claim.csv) is cleaned on its own, with
+the saved imputer, and written as a new Parquet partition under
+store/ingest_date=<date>/. The derived artifacts of the new dataset version
+are then produced from the current ones plus the batch alone, so the cost of
+an ingest follows the batch size rather than the size of the history:
+
+- column profiles (column_profile.py), merged with the batch's profiles
+- the aggregate cube (cube.py), added to the batch's cube
+- the correlation moments (correlation.py), added to the batch's moments
+- the stratified sample (sampling.py), merged with the batch's sample
+
+The pages pick the partition up on their next rerun.
+"""
+
+import argparse
+import datetime
+import os
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+import cleaning
+import column_profile
+import correlation
+import cube
+import data
+import imputation
+import sampling
+
+# Derived artifacts kept up to date incrementally: name -> (load current, build from rows, merge, save)
+ARTIFACTS = {
+    # Outside the app, the profiles of a version without them are built on every core
+    'column profiles': (partial(column_profile.load_profile, n_jobs=None), column_profile.profile_frame,
+                        column_profile.merge_profiles, column_profile.save),
+    'aggregate cube': (cube.load_cube, cube.build, cube.merge, cube.save),
+    'correlation moments': (correlation.load_moments, correlation.build_moments,
+                            correlation.merge, correlation.save),
+    'stratified sample': (sampling.load_sample, sampling.build, sampling.merge, sampling.save),
+}
+
+
+def partition_path(date):
+    """Next free partition file for an ingest date."""
+    directory = data.STORE_DIR / f'ingest_date={date}'
+    n = len(list(directory.glob('part-*.parquet'))) if directory.exists() else 0
+    return directory / f'part-{n:05d}.parquet'
+
+
+def ingest(source, date=None, imputer_path=imputation.IMPUTER_PATH, chunksize=cleaning.DEFAULT_CHUNKSIZE):
+    """Clean ``source`` into a new partition and update the artifacts.
+
+    Returns the partition path and its row count. The imputer must exist: fitted
+    on one batch alone, it would be reused for every later clean and ingest.
+    """
+    if imputer_path is not None and not Path(imputer_path).exists():
+        raise FileNotFoundError(
+            f"No imputer at {imputer_path}; fit one on the full raw extract before ingesting "
+            f"(python imputation.py fit car_insurance_claim.csv)")
+    date = date or datetime.date.today().isoformat()
+    path = partition_path(date)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Derived artifacts of the current version (built once if they do not exist yet)
+    current = {name: load() for name, (load, _, _, _) in ARTIFACTS.items()}
+    paths = data.source_paths('cleaned')
+
+    # Hidden until the artifacts are saved: the name does not match the partition pattern
+    tmp = path.with_name(f'.{path.stem}.tmp.parquet')
+    rows = cleaning.run(source, tmp, chunksize, imputer_path, fit_imputer=False)
+    if rows == 0:
+        tmp.unlink(missing_ok=True)
+        raise ValueError(f"{source} has no rows left after cleaning")
+
+    # Version of the dataset with the new partition in place, computed before it becomes visible
+    versions = {p: data.file_version(p) for p in paths}
+    versions[path] = data.file_version(tmp)
+    new_version = data.combine_versions([versions[p] for p in sorted(versions, key=_order(paths))])
+
+    batch = pd.read_parquet(tmp)
+    for name, (_, build, merge, save) in ARTIFACTS.items():
+        save(merge(current[name], build(batch)), new_version)
+
+    os.replace(tmp, path)
+    return path, rows
+
+
+def _order(paths):
+    # The base file first, then partitions by path
+    base = paths[0]
+    return lambda p: (p != base, str(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help='raw batch shaped like car_insurance_claim.csv')
+    parser.add_argument('--date', default=None, help='ingest date for the partition (default: today)')
+    parser.add_argument('--imputer', default=imputation.IMPUTER_PATH, help='fitted imputer')
+    args = parser.parse_args()
+
+    try:
+        path, rows = ingest(args.source, args.date, args.imputer)
+    except FileNotFoundError as exc:
+        parser.error(str(exc))
+    print(f"Ingested {rows:,} rows into {path}")
+
+
+if __name__ == '__main__':
+    main()
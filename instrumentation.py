@@ -0,0 +1,225 @@
+"""Section timings, chart payload sizes and peak memory of page runs.
+
+Enabled with the APP_METRICS environment variable (e.g. ``APP_METRICS=1
+streamlit run Home.py``); when it is not set every helper below reduces to a
+flag check, so the pages pay nothing in production.
+
+A page starts a run, wraps its logical sections and sends its charts through
+``chart`` (a ``st.fragment`` wraps its body in ``fragment(name)``, so its
+own reruns are recorded as runs too):
+
+    start_run('Multivariate Analysis')
+    with section('Question 1'):
+        with section('figure'):
+            fig = px.bar(...)
+        chart(fig, use_container_width=True)
+    finish_run()
+
+For every section the run records the wall time, the peak memory allocated
+above the section's starting point (tracemalloc; process-wide, so concurrent
+sessions add to each other's peaks, disable with APP_METRICS_MEMORY=0) and,
+for charts, the size of the figure JSON sent to the browser. ``finish_run``
+appends the run as one JSON line to APP_METRICS_LOG (default
+artifacts/metrics/page_runs.jsonl) and, when "Performance panel" is ticked
+in the sidebar, shows the table there.
+
+    python instrumentation.py [log.jsonl]
+
+prints the median and 95th percentile time of every page section in a log.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import pandas as pd
+import plotly.io as pio
+import streamlit as st
+
+import data
+import figure_cache
+
+ENABLED = os.environ.get('APP_METRICS', '') not in ('', '0')
+TRACK_MEMORY = ENABLED and os.environ.get('APP_METRICS_MEMORY', '1') != '0'
+LOG_PATH = Path(os.environ.get('APP_METRICS_LOG', data.BASE_DIR / 'artifacts' / 'metrics' / 'page_runs.jsonl'))
+
+_NO_SECTION = nullcontext()
+_local = threading.local()  # the current script thread's run
+_log_lock = threading.Lock()
+
+
+class Run:
+    """Sections recorded during one execution of a page script."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.sections = []  # finished sections, as dicts
+        self.stack = []     # open sections: [name, start time, peak bytes, starting bytes, excluded seconds]
+        self.excluded = 0.0  # seconds spent measuring rather than rendering
+
+    def open(self, name):
+        if TRACK_MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            self._raise_peaks(peak)
+            tracemalloc.reset_peak()
+        else:
+            current = 0
+        path = ' / '.join([s[0] for s in self.stack] + [name])
+        self.stack.append([path, time.perf_counter(), current, current, 0.0])
+
+    def mark(self):
+        """The clock and the traced peak now, to close the current section with later."""
+        return time.perf_counter(), tracemalloc.get_traced_memory()[1] if TRACK_MEMORY else 0
+
+    def close(self, payload_bytes=None, mark=None):
+        """Record the innermost open section, as of ``mark`` if given (else now)."""
+        path, start, peak, base, excluded = self.stack.pop()
+        ended, traced_peak = mark or self.mark()
+        seconds = ended - start - excluded
+        if TRACK_MEMORY:
+            peak = max(peak, traced_peak)
+            self._raise_peaks(peak)
+            tracemalloc.reset_peak()
+        record = {'section': path, 'seconds': round(seconds, 5)}
+        if TRACK_MEMORY:
+            record['peak_mb'] = round((peak - base) / 2 ** 20, 3)
+        if payload_bytes is not None:
+            record['bytes'] = payload_bytes
+        self.sections.append(record)
+
+    def exclude(self, since):
+        """Leave the time since ``since`` (a perf_counter) out of the open sections and the run."""
+        seconds = time.perf_counter() - since
+        for s in self.stack:
+            s[4] += seconds
+        self.excluded += seconds
+
+    def _raise_peaks(self, peak):
+        # Open sections keep the highest peak seen since they started
+        for s in self.stack:
+            s[2] = max(s[2], peak)
+
+    def as_dict(self):
+        return {
+            'time': datetime.datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'page': self.page,
+            'seconds': round(time.perf_counter() - self.start - self.excluded, 5),
+            'sections': self.sections,
+        }
+
+
+def _current():
+    return getattr(_local, 'run', None)
+
+
+def start_run(page):
+    """Start recording a page run (call at the top of the page script)."""
+    if not ENABLED:
+        return
+    if TRACK_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.run = Run(page)
+    st.session_state['_metrics_page'] = page
+
+
+@contextmanager
+def _section(run, name):
+    run.open(name)
+    try:
+        yield
+    finally:
+        run.close()
+
+
+def section(name):
+    """Context manager timing one logical section of the current run."""
+    run = _current() if ENABLED else None
+    if run is None:
+        return _NO_SECTION
+    return _section(run, name)
+
+
+@contextmanager
+def _fragment_run(name):
+    _local.run = Run(f"{st.session_state.get('_metrics_page', '')}: {name}")
+    try:
+        yield
+    finally:
+        finish_run(panel=False)
+
+
+def fragment(name):
+    """Section of the current run; on a fragment-only rerun, a run of its own."""
+    if not ENABLED:
+        return _NO_SECTION
+    run = _current()
+    return _fragment_run(name) if run is None else _section(run, name)
+
+
+def chart(fig, name='chart', **kwargs):
+    """``st.plotly_chart``, recording the serialization time and payload size."""
+    run = _current() if ENABLED else None
+    if run is None:
+        return figure_cache.plotly_chart(fig, **kwargs)
+    run.open(name)
+    try:
+        element = figure_cache.plotly_chart(fig, **kwargs)
+    finally:
+        # Measuring the payload serializes a figure once more: the chart is closed as of before it, its
+        # time is left out of the enclosing sections, and closing resets the traced peak it raised
+        sent = run.mark()
+        payload = len(fig) if isinstance(fig, str) else len(pio.to_json(fig, validate=False))
+        run.close(payload_bytes=payload, mark=sent)
+        run.exclude(sent[0])
+    return element
+
+
+def finish_run(panel=True):
+    """Close the current run: append it to the log and show the sidebar panel."""
+    run = _current() if ENABLED else None
+    if run is None:
+        return
+    _local.run = None
+    record = run.as_dict()
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with _log_lock, open(LOG_PATH, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+    # Fragments cannot write to the sidebar
+    if panel and st.sidebar.checkbox("Performance panel", key='_metrics_panel'):
+        st.sidebar.caption(f"{record['page']}: {record['seconds']:.3f}s in total")
+        hits = figure_cache.stats()
+        st.sidebar.caption(f"Figure cache: {hits['memory']} memory / {hits['disk']} disk hits, "
+                           f"{hits['miss']} built")
+        st.sidebar.dataframe(record['sections'], use_container_width=True, hide_index=True)
+
+
+def summarize(path=LOG_PATH):
+    """Median and 95th percentile seconds (and mean payload) per page section."""
+    runs = [json.loads(line) for line in Path(path).read_text(encoding='utf-8').splitlines() if line]
+    rows = [dict(page=r['page'], **s) for r in runs for s in r['sections']]
+    rows += [{'page': r['page'], 'section': '(page)', 'seconds': r['seconds']} for r in runs]
+    sections = pd.DataFrame(rows).groupby(['page', 'section'], sort=False)
+    result = sections['seconds'].describe(percentiles=[0.5, 0.95])[['count', '50%', '95%', 'max']]
+    if 'bytes' in sections.obj:
+        result['bytes'] = sections['bytes'].mean()
+    return result.sort_values('95%', ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log', nargs='?', default=LOG_PATH)
+    args = parser.parse_args()
+    print(summarize(args.log).to_string())
+
+
+if __name__ == '__main__':
+    main()
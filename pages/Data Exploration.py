@@ -1,12 +1,32 @@
+import time
+
 import streamlit as st
-import pandas as pd
-from ydata_profiling import ProfileReport
-from streamlit_pandas_profiling import st_profile_report
+import streamlit.components.v1 as components
+
+from instrumentation import finish_run, section, start_run
+from profiling import RETRY_SECONDS, request_report
+
+start_run('Data Exploration')
 
 st.title('Data Exploration')
 
-df = pd.read_csv('car_insurance_claim.csv')
+# The profiling report is built once per dataset version and then served from disk
+with section('Report lookup'):
+    html, build = request_report('raw')
+
+if html is not None:
+    with section('Report'):
+        components.html(html, height=1200, scrolling=True)
+elif build.error is not None:
+    st.error(f"Building the profiling report failed: {build.error}. "
+             f"It is retried when the page is opened again after {RETRY_SECONDS} seconds.")
+else:
+    st.info("The profiling report for this version of the data is being generated. "
+            "It only needs to be built once.")
+    st.progress(build.progress, text=build.stage)
 
-profile_report = ProfileReport(df= df)
+finish_run()
 
-st_profile_report(profile_report)
\ No newline at end of file
+if html is None and build.error is None:
+    time.sleep(1)
+    st.rerun()
@@ -0,0 +1,43 @@
+import time
+
+import streamlit as st
+
+import scoring
+from filters import sidebar
+from instrumentation import finish_run, section, start_run
+from render import static_section
+from sections import RISK, RISK_DESCRIPTION
+
+start_run("Risk Scores")
+
+# Streamlit page configuration
+st.set_page_config(page_title="Risk Scores", layout="wide")
+
+scope = sidebar()
+
+# Title and description
+st.title("Risk Scores")
+st.write(RISK_DESCRIPTION)
+
+# The model and the scores of the book are cached per dataset version; after the data
+# changes the model is trained once in the background while the page shows its state
+with section("Model"):
+    model, training = scoring.request_model()
+
+if model is not None:
+    for build_section in RISK:
+        static_section(scope, build_section, build_section.__name__, model.version)
+        st.divider()
+elif training.error is not None:
+    st.error(f"Training the risk models failed: {training.error}. "
+             f"It is retried when the page is opened again after {scoring.RETRY_SECONDS} seconds.")
+else:
+    st.info("The risk models for this version of the data are being trained in the background. "
+            "This only happens once per dataset version.")
+    st.caption(f"Training for {time.monotonic() - training.started:.0f}s")
+
+finish_run()
+
+if model is None and training.error is None:
+    time.sleep(1)
+    st.rerun()
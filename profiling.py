@@ -0,0 +1,123 @@
+"""Profiling reports built once per dataset version, in the background.
+
+Building a ydata_profiling report takes many seconds of CPU, so the Data
+Exploration page no longer builds one per visit. ``request_report`` returns
+the stored HTML when a report for the current dataset version exists and
+otherwise starts (at most one) background build and returns its progress.
+
+Reports are stored as HTML and JSON under artifacts/profiles, named after the
+dataset's content hash and the profiling mode:
+
+- ``full``: the complete report
+- ``minimal``: ydata_profiling's minimal mode over a random sample of
+  SAMPLE_ROWS rows, for very large inputs
+
+``auto`` (the default, overridable with the PROFILE_MODE environment variable)
+picks ``minimal`` above MINIMAL_ABOVE_ROWS rows.
+
+A failed build is reported for RETRY_SECONDS; the first request after that
+starts it again.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import data
+
+PROFILE_DIR = data.BASE_DIR / 'artifacts' / 'profiles'
+MINIMAL_ABOVE_ROWS = int(os.environ.get('PROFILE_MINIMAL_ABOVE_ROWS', 100_000))
+SAMPLE_ROWS = int(os.environ.get('PROFILE_SAMPLE_ROWS', 100_000))
+RETRY_SECONDS = 30
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='profiling')
+_lock = threading.Lock()
+_builds = {}  # (version, mode) -> Build
+
+
+class Build:
+    """Progress of one background report build."""
+
+    def __init__(self):
+        self.progress = 0.0
+        self.stage = 'Queued'
+        self.error = None
+        self.failed_at = None
+        self.future = None
+
+
+def report_paths(version, mode):
+    """HTML and JSON paths of the report for one dataset version and mode."""
+    stem = f'{version[:16]}-{mode}'
+    return PROFILE_DIR / f'{stem}.html', PROFILE_DIR / f'{stem}.json'
+
+
+def resolve_mode(mode, n_rows):
+    if mode == 'auto':
+        return 'minimal' if n_rows > MINIMAL_ABOVE_ROWS else 'full'
+    return mode
+
+
+def _write(path, text):
+    # Readers only ever see complete files
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def _build(kind, version, mode, build):
+    from ydata_profiling import ProfileReport
+
+    build.stage = 'Loading data'
+    df = data.load_raw() if kind == 'raw' else data.load_cleaned()
+    build.progress = 0.1
+
+    if mode == 'minimal' and len(df) > SAMPLE_ROWS:
+        build.stage = f'Sampling {SAMPLE_ROWS:,} of {len(df):,} rows'
+        df = df.sample(SAMPLE_ROWS, random_state=0)
+    build.progress = 0.2
+
+    build.stage = 'Profiling columns'
+    report = ProfileReport(df, minimal=mode == 'minimal', progress_bar=False)
+    html = report.to_html()
+    build.progress = 0.8
+
+    build.stage = 'Writing report'
+    html_path, json_path = report_paths(version, mode)
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    _write(json_path, report.to_json())
+    _write(html_path, html)
+    build.progress = 1.0
+    build.stage = 'Done'
+
+
+def _run(kind, version, mode, build):
+    try:
+        _build(kind, version, mode, build)
+    except Exception as exc:
+        build.error = exc
+        build.stage = 'Failed'
+        build.failed_at = time.monotonic()
+
+
+def request_report(kind='raw', mode=None):
+    """Return ``(html, build)``: the stored report, or the build producing it."""
+    mode = mode or os.environ.get('PROFILE_MODE', 'auto')
+    version = data.dataset_version(kind)
+    if mode == 'auto':
+        n_rows = len(data.load_raw([]) if kind == 'raw' else data.load_cleaned([]))
+        mode = resolve_mode(mode, n_rows)
+
+    html_path, _ = report_paths(version, mode)
+    if html_path.exists():
+        return html_path.read_text(encoding='utf-8'), None
+
+    with _lock:
+        build = _builds.get((version, mode))
+        # A failed build is shown for RETRY_SECONDS, then the next request starts a new one
+        if build is None or (build.error is not None and time.monotonic() - build.failed_at > RETRY_SECONDS):
+            build = Build()
+            build.future = _executor.submit(_run, kind, version, mode, build)
+            _builds[(version, mode)] = build
+    return None, build
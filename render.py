@@ -0,0 +1,54 @@
+"""Streamlit rendering of the sections built in sections.py.
+
+Sections are built through ``Scope.section``, so a static section comes from
+the figure cache (figure_cache.py) once anyone has viewed it and later reruns
+only send its stored figure JSON again. Interactive parts run as
+``st.fragment``s: a widget inside one reruns that fragment alone, not the
+page.
+"""
+
+import streamlit as st
+
+from instrumentation import chart, fragment, section
+
+
+def render_section(section, heading='header', expander='Insights'):
+    """Title (unless ``heading`` is None), metrics, figures side by side, then the insights."""
+    if heading:
+        getattr(st, heading)(section.title)
+
+    if section.metrics:
+        for col, (label, value) in zip(st.columns(len(section.metrics)), section.metrics):
+            with col:
+                st.metric(label=label, value=value)
+
+    if len(section.figures) == 1:
+        chart(section.figures[0], use_container_width=True)
+    elif section.figures:
+        for i, (col, fig) in enumerate(zip(st.columns(len(section.figures)), section.figures), 1):
+            with col:
+                chart(fig, f"chart {i}", use_container_width=True)
+
+    if section.insights:
+        with st.expander(expander):
+            st.markdown(section.insights)
+
+
+def static_section(scope, build, name, *args, **kwargs):
+    """Build (once per scope) and render a section without widgets."""
+    with section(name):
+        with section("figure"):
+            built = scope.section(build, *args)
+        render_section(built, **kwargs)
+
+
+@st.fragment
+def lazy_section(scope, build, name):
+    """A section whose figures are built only once the reader switches them on."""
+    with fragment(name):
+        preview = scope.section(build, False)
+        st.header(preview.title)
+        if st.toggle("Show chart", key=f"show_{build.__name__}"):
+            with section("figure"):
+                preview = scope.section(build)
+        render_section(preview, heading=None)
@@ -0,0 +1,281 @@
+"""Static HTML/JSON reports of the Home, Univariate and Multivariate pages.
+
+    python report.py reports/2026-10-17
+    python report.py reports/2026-10-17 --segment-by urbanicity car_type --jobs 16
+
+Runs the page sections (sections.py) without a Streamlit server and writes,
+for every segment and page, a self-contained ``<page>.html`` (plotly.js
+inlined; ``--plotlyjs cdn`` links it instead) and a ``<page>.json`` holding
+the figures, insights, metrics and tables:
+
+    reports/2026-10-17/index.html
+    reports/2026-10-17/all/home.html, univariate.html, multivariate.html (+ .json)
+    reports/2026-10-17/urbanicity=highly-urban-urban-fc7035a2/...
+
+The first segment is the whole dataset (from the cached artifacts); each
+``--segment-by`` column adds one segment per value, with the cube, column
+statistics, correlations and profiles computed from that segment's rows.
+Every (segment, page) pair is rendered in its own worker process.
+"""
+
+import argparse
+import datetime
+import hashlib
+import html
+import json
+import os
+import re
+import textwrap
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+import data
+import schema
+import sections
+
+PAGES = {
+    'home': ('Home Page', sections.HOME_DESCRIPTION),
+    'univariate': ('Univariate Analysis',
+                   "This page provides key performance indicators (KPIs) and univariate analysis of the cleaned dataset."),
+    'multivariate': ('Multivariate Analysis',
+                     "This page explores relationships between multiple variables to uncover insights in car insurance data."),
+}
+
+
+def build_sections(page, scope):
+    """Every section of a page for one scope, with the interactive choices expanded."""
+    if page == 'home':
+        return [build(scope) for build in sections.HOME]
+    if page == 'univariate':
+        return ([sections.kpis(scope)]
+                + [build(scope) for build in sections.UNIVARIATE_FEATURED]
+                + [sections.numeric_column(scope, col) for col in schema.numeric_columns()]
+                + [sections.categorical_column(scope, col) for col in schema.categorical_columns()])
+    return ([build(scope) for build in sections.MULTIVARIATE_QUESTIONS]
+            + [sections.correlation_matrix(scope, method) for method in ('Pearson', 'Spearman')]
+            + [sections.Section('Summary', 'Summary of Key Findings', insights=sections.MULTIVARIATE_SUMMARY)])
+
+
+def value_label(column, value):
+    """A segment value as the pages show it: Yes/No for the flag columns."""
+    if column in schema.FLAGS:
+        return 'Yes' if value else 'No'
+    return str(value)
+
+
+def segment_slug(column, value):
+    """Directory name of a segment: the value made readable, plus a hash of the value itself.
+
+    The hash keeps values that read alike apart (education '<High School' and 'High School').
+    """
+    if column is None:
+        return 'all'
+    readable = re.sub(r'[^a-z0-9]+', '-', value_label(column, value).lower()).strip('-')
+    digest = hashlib.sha1(str(value).encode('utf-8')).hexdigest()[:8]
+    return f"{column}={readable}-{digest}"
+
+
+def _scope(column, value):
+    if column is None:
+        return sections.Scope.current()
+    df = data.load_cleaned()
+    return sections.Scope(df[df[column] == value], label=f"{column} = {value_label(column, value)}")
+
+
+# HTML output
+
+def _inline(text):
+    return re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html.escape(text))
+
+
+def markdown_to_html(text):
+    """The small subset of Markdown the insight blocks use."""
+    out, list_tag = [], None
+    for line in textwrap.dedent(text).strip().splitlines():
+        line = line.strip()
+        item = re.match(r'^(-|\d+\.) (.*)$', line)
+        tag = None if item is None else ('ul' if item.group(1) == '-' else 'ol')
+        if list_tag and tag != list_tag:
+            out.append(f'</{list_tag}>')
+            list_tag = None
+        if item:
+            if list_tag is None:
+                out.append(f'<{tag}>')
+                list_tag = tag
+            out.append(f'<li>{_inline(item.group(2))}</li>')
+        elif line == '---':
+            out.append('<hr>')
+        elif line.startswith('#'):
+            level = min(len(line) - len(line.lstrip('#')), 6)
+            out.append(f'<h{level}>{_inline(line.lstrip("#").strip())}</h{level}>')
+        elif line:
+            out.append(f'<p>{_inline(line)}</p>')
+    if list_tag:
+        out.append(f'</{list_tag}>')
+    return '\n'.join(out)
+
+
+def _table_html(table):
+    frame = table.to_frame() if hasattr(table, 'to_frame') else table
+    return frame.to_html(classes='table', border=0)
+
+
+def section_html(section):
+    parts = [f'<section><h2>{html.escape(section.title)}</h2>']
+    if section.metrics:
+        parts.append('<div class="metrics">' + ''.join(
+            f'<div class="metric"><div class="label">{html.escape(label)}</div>'
+            f'<div class="value">{html.escape(str(value))}</div></div>' for label, value in section.metrics) + '</div>')
+    if section.figures:
+        parts.append('<div class="figures">' + ''.join(
+            f'<div class="figure">{pio.to_html(fig, full_html=False, include_plotlyjs=False)}</div>'
+            for fig in section.figures) + '</div>')
+    if section.table is not None:
+        parts.append(_table_html(section.table))
+    if section.insights:
+        parts.append(f'<div class="insights">{markdown_to_html(section.insights)}</div>')
+    parts.append('</section>')
+    return '\n'.join(parts)
+
+
+STYLE = """
+body { font-family: sans-serif; margin: 2rem auto; max-width: 1200px; color: #262730; }
+section { border-top: 1px solid #ddd; padding-top: 1rem; margin-top: 1.5rem; }
+.metrics, .figures { display: flex; gap: 1rem; }
+.metric, .figure { flex: 1; min-width: 0; }
+.metric .label { font-size: 0.9rem; color: #666; }
+.metric .value { font-size: 2rem; }
+.insights { background: #f6f7f9; padding: 0.5rem 1rem; border-radius: 4px; }
+.table { border-collapse: collapse; margin: 0.5rem 0; }
+.table td, .table th { padding: 0.2rem 0.6rem; border-bottom: 1px solid #eee; text-align: right; }
+"""
+
+
+def _plotlyjs_tag(plotlyjs):
+    if plotlyjs == 'cdn':
+        return f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>'
+    return f'<script type="text/javascript">{get_plotlyjs()}</script>'
+
+
+def page_html(page, scope, page_sections, generated, plotlyjs):
+    title, description = PAGES[page]
+    body = '\n'.join(section_html(section) for section in page_sections)
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)} - {html.escape(scope.label)}</title>
+<style>{STYLE}</style>
+{_plotlyjs_tag(plotlyjs)}
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+<p><strong>{html.escape(scope.label)}</strong> &middot; {scope.n_rows:,} rows &middot; generated {generated}</p>
+{markdown_to_html(description)}
+{body}
+</body>
+</html>
+"""
+
+
+def page_json(page, scope, page_sections, generated):
+    return {
+        'page': page,
+        'segment': scope.label,
+        'rows': scope.n_rows,
+        'generated': generated,
+        'sections': [{
+            'name': section.name,
+            'title': section.title,
+            'metrics': [[label, str(value)] for label, value in section.metrics],
+            'figures': [json.loads(pio.to_json(fig, validate=False)) for fig in section.figures],
+            'table': None if section.table is None else json.loads(section.table.to_json(orient='split')),
+            'insights': textwrap.dedent(section.insights).strip(),
+        } for section in page_sections],
+    }
+
+
+def render(column, value, page, output, generated, plotlyjs='inline'):
+    """Write the HTML and JSON of one page for one segment (runs in a worker)."""
+    scope = _scope(column, value)
+    page_sections = build_sections(page, scope)
+    directory = Path(output) / segment_slug(column, value)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f'{page}.html').write_text(
+        page_html(page, scope, page_sections, generated, plotlyjs), encoding='utf-8')
+    (directory / f'{page}.json').write_text(
+        json.dumps(page_json(page, scope, page_sections, generated), default=str), encoding='utf-8')
+    return scope.label, directory.name, page
+
+
+def segments(columns):
+    """(column, value) of the whole dataset, then of every value of each column."""
+    result = [(None, None)]
+    for column in columns:
+        values = data.load_cleaned([column])[column].dropna().unique()
+        result += [(column, value) for value in sorted(values)]
+    return result
+
+
+def index_html(rendered, generated):
+    rows = []
+    for label, slug in dict.fromkeys((label, slug) for label, slug, _ in rendered):
+        links = ' '.join(f'<a href="{slug}/{page}.html">{PAGES[page][0]}</a>'
+                         for page in PAGES if (label, slug, page) in rendered)
+        rows.append(f'<tr><td>{html.escape(label)}</td><td>{links}</td></tr>')
+    return f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Claims reports</title><style>{STYLE}</style></head>
+<body>
+<h1>Claims reports</h1>
+<p>Generated {generated}</p>
+<table class="table">{''.join(rows)}</table>
+</body>
+</html>
+"""
+
+
+def build_reports(output, segment_by=(), pages=tuple(PAGES), jobs=None, plotlyjs='inline'):
+    """Render every (segment, page) pair in a process pool; returns what was written."""
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    generated = datetime.datetime.now().isoformat(timespec='seconds')
+    chosen = segments(segment_by)
+    slugs = [segment_slug(column, value) for column, value in chosen]
+    duplicates = sorted({slug for slug in slugs if slugs.count(slug) > 1})
+    if duplicates:
+        raise ValueError(f"Segments would share report directories: {', '.join(duplicates)}")
+    tasks = [(column, value, page) for column, value in chosen for page in pages]
+
+    rendered = set()
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        futures = [executor.submit(render, column, value, page, output, generated, plotlyjs)
+                   for column, value, page in tasks]
+        for i, future in enumerate(as_completed(futures), 1):
+            label, slug, page = future.result()
+            rendered.add((label, slug, page))
+            print(f"[{i}/{len(tasks)}] {label}: {page}")
+
+    (output / 'index.html').write_text(index_html(rendered, generated), encoding='utf-8')
+    return rendered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help='directory to write the reports to')
+    parser.add_argument('--segment-by', nargs='*', default=[], help='columns to render one report per value of')
+    parser.add_argument('--pages', nargs='+', default=list(PAGES), choices=list(PAGES))
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--plotlyjs', choices=['inline', 'cdn'], default='inline',
+                        help='inline plotly.js (self-contained) or link it from the CDN')
+    args = parser.parse_args()
+
+    rendered = build_reports(args.output, args.segment_by, args.pages, args.jobs, args.plotlyjs)
+    print(f"Wrote {len(rendered)} reports to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
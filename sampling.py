@@ -0,0 +1,200 @@
+"""A stratified sample of the cleaned dataset for approximate answers (approx.py).
+
+Rows are stratified by car type, urbanicity and claim flag, and each stratum
+keeps at most PER_STRATUM rows (``APP_SAMPLE_PER_STRATUM``, default 1,000):
+the ones with the smallest keys, where a row's key is a hash of its values.
+That is a simple random sample within the stratum, and since the smallest
+keys of two parts are the smallest keys of their union, a sample for new
+rows merges into an existing one (ingest.py). The sample also holds the
+population of every stratum.
+
+Group means and totals are estimated with the stratified estimator, each
+sampled row standing for N_h / n_h rows of its stratum. Means of a group or a
+segment are ratio estimates; their variance is the linearized stratified
+variance, with the finite population correction, and the confidence
+intervals are normal at 95%. A stratum sampled whole is exact.
+
+The sample of the current dataset version is stored under artifacts/samples.
+"""
+
+import os
+import pickle
+import threading
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+import cube
+import data
+import engines
+import schema
+
+SAMPLE_DIR = data.BASE_DIR / 'artifacts' / 'samples'
+PER_STRATUM = int(os.environ.get('APP_SAMPLE_PER_STRATUM', 1_000))
+Z = 1.959964  # normal quantile of a 95% confidence interval
+
+# Strata columns and their values; missing or unknown values form one more value each
+STRATA = {
+    'car_type': schema.CATEGORIES['car_type'],
+    'urbanicity': schema.CATEGORIES['urbanicity'],
+    'claim_flag': [0, 1],
+}
+N_STRATA = int(np.prod([len(values) + 1 for values in STRATA.values()]))
+# The cube's columns and the sidebar's filter columns (filters.py)
+COLUMNS = cube.COLUMNS + ['urbanicity', 'Customer_Loyalty', 'claim_flag']
+
+_lock = threading.Lock()
+_samples = {}  # (dataset version, rows per stratum) -> StratifiedSample
+
+
+def stratum_codes(df):
+    """The stratum of every row of ``df``, as a number below N_STRATA."""
+    codes = np.zeros(len(df), dtype='int64')
+    for col, values in STRATA.items():
+        codes = codes * (len(values) + 1) + pd.Categorical(df[col], categories=values).codes + 1
+    return codes
+
+
+def _keys(df):
+    # Uniform in [0, 1) and a function of the row's values alone
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return (hashes >> np.uint64(11)) * 2.0 ** -53
+
+
+def _smallest_keys(rows, per_stratum):
+    return rows.sort_values('_key').groupby('_stratum', sort=False).head(per_stratum).reset_index(drop=True)
+
+
+class StratifiedSample:
+    """Up to ``per_stratum`` rows of every stratum, with the population of each stratum."""
+
+    def __init__(self, rows, population, per_stratum=PER_STRATUM):
+        self.rows = rows                # COLUMNS plus '_stratum' and '_key'
+        self.population = population    # rows of the full dataset per stratum
+        self.per_stratum = per_stratum
+
+    @classmethod
+    def from_frame(cls, df, per_stratum=PER_STRATUM):
+        rows = df[COLUMNS].copy()
+        rows['_stratum'] = stratum_codes(rows)
+        rows['_key'] = _keys(df[COLUMNS])
+        population = np.bincount(rows['_stratum'], minlength=N_STRATA)
+        return cls(_smallest_keys(rows, per_stratum), population, per_stratum)
+
+    @property
+    def n_rows(self):
+        return int(self.population.sum())
+
+    @cached_property
+    def _design(self):
+        strata = self.rows['_stratum'].to_numpy()
+        sampled = np.bincount(strata, minlength=N_STRATA)
+        weights = self.population[strata] / sampled[strata]
+        return strata, sampled, weights
+
+    def _variance(self, z):
+        """Variance of the estimated total of ``z``, given for every sampled row."""
+        strata, n, _ = self._design
+        population = self.population
+        total = np.bincount(strata, weights=z, minlength=N_STRATA)
+        squares = np.bincount(strata, weights=z * z, minlength=N_STRATA)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s2 = (squares - total ** 2 / n) / (n - 1)
+            terms = population ** 2 * (1 - n / population) * s2 / n
+        # Strata with fewer than two sampled rows have no variance estimate and count as exact;
+        # a constant stratum can come out a rounding error below zero
+        return max(float(np.where(n > 1, terms, 0.0).sum()), 0.0)
+
+    def _estimate(self, values, domain):
+        """Estimated count, mean, std and sum of ``values`` over the sampled rows in ``domain``."""
+        _, _, weights = self._design
+        present = domain & ~np.isnan(values)
+        y = np.where(present, values, 0.0)
+        count = weights @ present
+        total = weights @ y
+        if count == 0:
+            return {'count': 0.0, 'mean': np.nan, 'std': np.nan, 'sum': 0.0, 'mean_ci': np.nan, 'sum_ci': 0.0}
+        mean = total / count
+        residuals = np.where(present, y - mean, 0.0)
+        return {
+            'count': count,
+            'mean': mean,
+            'std': np.sqrt(weights @ residuals ** 2 / count),
+            'sum': total,
+            'mean_ci': Z * np.sqrt(self._variance(residuals / count)),
+            'sum_ci': Z * np.sqrt(self._variance(y)),
+        }
+
+    def _values(self, column):
+        return self.rows[column].to_numpy(dtype='float64', na_value=np.nan)
+
+    def summary(self, dimension, selection=()):
+        """cube.summary() of the rows matching ``selection``, with a ``{measure}_mean_ci`` column per measure."""
+        _, _, weights = self._design
+        matching = engines.mask(self.rows, selection)
+        groups = cube.derive_groups(self.rows)[dimension]
+        codes = groups.cat.codes.to_numpy()
+        records = []
+        for code, value in enumerate(groups.cat.categories.astype(str)):
+            domain = matching & (codes == code)
+            record = {'value': value, 'rows': int(round(weights @ domain))}
+            for m in cube.MEASURES:
+                estimate = self._estimate(self._values(m), domain)
+                record[f'{m}_count'] = int(round(estimate['count']))
+                record[f'{m}_mean'] = estimate['mean']
+                record[f'{m}_std'] = estimate['std']
+                record[f'{m}_mean_ci'] = estimate['mean_ci']
+            records.append(record)
+        result = pd.DataFrame.from_records(records, index='value')
+        return result[result['rows'] > 0]
+
+    def describe(self, columns, selection=()):
+        """Count, mean, std and sum of numeric columns with the ``mean_ci`` and ``sum_ci`` half-widths."""
+        matching = engines.mask(self.rows, selection)
+        return pd.DataFrame({col: self._estimate(self._values(col), matching) for col in columns})
+
+
+def build(df, per_stratum=PER_STRATUM):
+    """The stratified sample of a cleaned frame (e.g. a new batch)."""
+    return StratifiedSample.from_frame(df, per_stratum)
+
+
+def merge(sample, other):
+    """The sample of the rows of two samples' datasets together."""
+    rows = pd.concat([sample.rows, other.rows], ignore_index=True)
+    return StratifiedSample(_smallest_keys(rows, sample.per_stratum), sample.population + other.population,
+                            sample.per_stratum)
+
+
+def sample_path(version, per_stratum=PER_STRATUM):
+    return SAMPLE_DIR / f'{version[:16]}-{per_stratum}.pkl'
+
+
+def load_sample():
+    """The sample of the current cleaned dataset, built and stored on first use."""
+    version = data.dataset_version('cleaned')
+    key = (version, PER_STRATUM)
+    with _lock:
+        if key in _samples:
+            return _samples[key]
+        path = sample_path(version)
+        if path.exists():
+            with open(path, 'rb') as f:
+                sample = pickle.load(f)
+        else:
+            sample = build(data.load_cleaned(COLUMNS))
+            save(sample, version)
+        _samples.clear()
+        _samples[key] = sample
+        return sample
+
+
+def save(sample, version):
+    SAMPLE_DIR.mkdir(parents=True, exist_ok=True)
+    path = sample_path(version, sample.per_stratum)
+    # The design arrays follow from the rows and are recomputed after loading
+    sample.__dict__.pop('_design', None)
+    with open(path, 'wb') as f:
+        pickle.dump(sample, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
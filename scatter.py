@@ -0,0 +1,101 @@
+"""Scatter plots whose size does not grow with the number of rows.
+
+``px.scatter(..., trendline="ols")`` ships every point to the browser and fits
+a statsmodels OLS on every rerun. ``scatter_figure`` instead:
+
+- draws all points with WebGL (``scattergl``) while there are at most
+  POINT_LIMIT of them;
+- above that, draws a binned density heatmap (``mode='density'``) or a
+  stratified sample of SAMPLE_SIZE points (``mode='sample'``), so the payload
+  stays flat;
+- computes the least-squares trendline from the sufficient statistics
+  (n, sums of x, y, xy, x^2, y^2), which can be accumulated chunk by chunk.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+POINT_LIMIT = 20_000
+SAMPLE_SIZE = 10_000
+DENSITY_BINS = 60
+
+
+class LineStats:
+    """Sufficient statistics for a simple linear regression of y on x."""
+
+    def __init__(self, n=0, sx=0.0, sy=0.0, sxy=0.0, sxx=0.0, syy=0.0):
+        self.n, self.sx, self.sy = n, sx, sy
+        self.sxy, self.sxx, self.syy = sxy, sxx, syy
+
+    @classmethod
+    def from_arrays(cls, x, y):
+        x = np.asarray(x, dtype='float64')
+        y = np.asarray(y, dtype='float64')
+        return cls(len(x), x.sum(), y.sum(), x @ y, x @ x, y @ y)
+
+    def __add__(self, other):
+        return LineStats(self.n + other.n, self.sx + other.sx, self.sy + other.sy,
+                         self.sxy + other.sxy, self.sxx + other.sxx, self.syy + other.syy)
+
+    def fit(self):
+        """Return ``(slope, intercept, r)``."""
+        cov = self.sxy - self.sx * self.sy / self.n
+        var_x = self.sxx - self.sx ** 2 / self.n
+        var_y = self.syy - self.sy ** 2 / self.n
+        slope = cov / var_x
+        intercept = (self.sy - slope * self.sx) / self.n
+        return slope, intercept, cov / np.sqrt(var_x * var_y)
+
+
+def stratified_sample(x, y, size=SAMPLE_SIZE, bins=DENSITY_BINS, seed=0):
+    """Indices of a sample of about ``size`` points, stratified on a 2-D grid.
+
+    Every non-empty grid cell keeps at least one point, so sparse regions
+    (outliers, rare combinations) stay visible.
+    """
+    cells = _cell_ids(x, bins) * bins + _cell_ids(y, bins)
+    counts = np.bincount(cells, minlength=bins * bins)
+    quota = np.maximum(1, np.round(counts * size / len(x))).astype('int64')
+
+    order = np.random.default_rng(seed).permutation(len(x))
+    rank = pd.Series(cells[order]).groupby(cells[order]).cumcount().to_numpy()
+    return np.sort(order[rank < quota[cells[order]]])
+
+
+def _cell_ids(values, bins):
+    edges = np.linspace(values.min(), values.max(), bins + 1)
+    return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+
+
+def scatter_figure(df, x, y, title, labels=None, mode='auto', opacity=0.6):
+    """Scatter (or density) figure of ``y`` against ``x`` with an OLS trendline."""
+    labels = labels or {}
+    pairs = df[[x, y]].dropna()
+    xs = pairs[x].to_numpy(dtype='float64')
+    ys = pairs[y].to_numpy(dtype='float64')
+
+    if mode == 'auto':
+        mode = 'points' if len(xs) <= POINT_LIMIT else 'density'
+
+    fig = go.Figure()
+    if mode == 'density':
+        counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=DENSITY_BINS)
+        fig.add_trace(go.Heatmap(
+            x=(x_edges[:-1] + x_edges[1:]) / 2,
+            y=(y_edges[:-1] + y_edges[1:]) / 2,
+            z=np.where(counts > 0, counts, np.nan).T,
+            colorscale='Blues', colorbar={'title': 'Count'}, name='Count'))
+    else:
+        keep = stratified_sample(xs, ys) if mode == 'sample' and len(xs) > SAMPLE_SIZE else slice(None)
+        fig.add_trace(go.Scattergl(x=xs[keep], y=ys[keep], mode='markers',
+                                   marker={'opacity': opacity}, name='Customers'))
+
+    if len(xs) > 1:
+        slope, intercept, r = LineStats.from_arrays(xs, ys).fit()
+        line_x = np.array([xs.min(), xs.max()])
+        fig.add_trace(go.Scatter(x=line_x, y=intercept + slope * line_x, mode='lines',
+                                 name=f'OLS trend (r={r:.3f})', line={'color': 'firebrick'}))
+
+    fig.update_layout(title=title, xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y))
+    return fig
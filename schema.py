@@ -0,0 +1,140 @@
+"""Column types for the raw and cleaned claims datasets.
+
+The same schema is applied whether a dataset is parsed from CSV or read from
+its columnar (Parquet) copy, so the pages always see identical dtypes.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Cleaned dataset
+CATEGORIES = {
+    'gender': ['F', 'M'],
+    'education': ['<High School', 'High School', 'Bachelors', 'Masters', 'PhD'],
+    'occupation': ['Blue Collar', 'Clerical', 'Doctor', 'Home Maker', 'Lawyer',
+                   'Manager', 'Other', 'Professional', 'Student'],
+    'car_use': ['Commercial', 'Private'],
+    'car_type': ['Minivan', 'Panel Truck', 'Pickup', 'SUV', 'Sports Car', 'Van'],
+    'urbanicity': ['Highly Rural/ Rural', 'Highly Urban/ Urban'],
+    'Customer_Loyalty': ['New Customer', 'Loyal Customer', 'Very Loyal Customer'],
+}
+
+# Yes/No columns, stored as booleans
+FLAGS = ['parent1', 'mstatus', 'red_car', 'revoked']
+
+# Whole-number columns and the narrowest type that holds them
+COUNTS = {
+    'kidsdriv': 'int8',
+    'age': 'int16',
+    'homekids': 'int8',
+    'travtime': 'int16',
+    'tif': 'int8',
+    'clm_freq': 'int8',
+    'mvr_pts': 'int8',
+    'claim_flag': 'int8',
+}
+
+# Continuous measures
+MEASURES = ['yoj', 'income', 'home_val', 'bluebook', 'oldclaim', 'clm_amt', 'car_age']
+
+CLEANED_COLUMNS = [
+    'kidsdriv', 'age', 'homekids', 'yoj', 'income', 'parent1', 'home_val', 'mstatus',
+    'gender', 'education', 'occupation', 'travtime', 'car_use', 'bluebook', 'tif',
+    'car_type', 'red_car', 'oldclaim', 'clm_freq', 'revoked', 'mvr_pts', 'clm_amt',
+    'car_age', 'claim_flag', 'urbanicity', 'Customer_Loyalty',
+]
+
+# Raw extract: currency columns stay as text until the cleaning step
+RAW_CATEGORICAL = ['PARENT1', 'MSTATUS', 'GENDER', 'EDUCATION', 'OCCUPATION',
+                   'CAR_USE', 'CAR_TYPE', 'RED_CAR', 'REVOKED', 'URBANICITY']
+RAW_COUNTS = {
+    'KIDSDRIV': 'int8',
+    'AGE': 'int16',
+    'HOMEKIDS': 'int8',
+    'TRAVTIME': 'int16',
+    'TIF': 'int8',
+    'CLM_FREQ': 'int8',
+    'MVR_PTS': 'int8',
+    'CLAIM_FLAG': 'int8',
+}
+
+
+def numeric_columns():
+    """Numeric columns of the cleaned dataset, in file order."""
+    numeric = set(COUNTS) | set(MEASURES)
+    return [col for col in CLEANED_COLUMNS if col in numeric]
+
+
+def categorical_columns():
+    """Categorical and Yes/No columns of the cleaned dataset, in file order."""
+    categorical = set(CATEGORIES) | set(FLAGS)
+    return [col for col in CLEANED_COLUMNS if col in categorical]
+
+
+def _to_int(series, dtype):
+    # Missing values need the nullable integer type
+    if series.isna().any():
+        return series.astype(dtype.capitalize())
+    return series.astype(dtype)
+
+
+def to_flag(series):
+    """Map Yes/No text (any case) to booleans; missing or other values stay missing."""
+    if series.dtype in (bool, 'boolean'):
+        return series
+    flags = series.astype('string').str.lower().map({'yes': True, 'no': False}).astype('boolean')
+    # Missing values need the nullable boolean type
+    if flags.isna().any():
+        return flags
+    return flags.astype(bool)
+
+
+def flag_labels(series):
+    """Map a boolean column back to Yes/No labels for display."""
+    return series.map({True: 'Yes', False: 'No'})
+
+
+def compact(series):
+    """The column as float32 when every value survives the round trip, else unchanged.
+
+    Whole-dollar amounts and small whole numbers (bluebook, clm_amt, car_age,
+    ...) fit exactly; imputed fractional values (income, home_val) keep
+    float64. Applied in memory only, so the files keep one stable type.
+    """
+    if series.dtype != 'float64':
+        return series
+    values = series.to_numpy()
+    narrow = values.astype('float32')
+    if np.array_equal(narrow.astype('float64'), values, equal_nan=True):
+        return pd.Series(narrow, index=series.index, name=series.name)
+    return series
+
+
+def apply_cleaned(df):
+    """Return the cleaned dataset with its explicit column types."""
+    df = df.copy()
+    for col, categories in CATEGORIES.items():
+        if col in df:
+            df[col] = pd.Categorical(df[col], categories=categories)
+    for col in FLAGS:
+        if col in df:
+            df[col] = to_flag(df[col])
+    for col, dtype in COUNTS.items():
+        if col in df:
+            df[col] = _to_int(df[col], dtype)
+    for col in MEASURES:
+        if col in df:
+            df[col] = df[col].astype('float64')
+    return df
+
+
+def apply_raw(df):
+    """Return the raw extract with categoricals and narrow count types."""
+    df = df.copy()
+    for col in RAW_CATEGORICAL:
+        if col in df:
+            df[col] = df[col].astype('category')
+    for col, dtype in RAW_COUNTS.items():
+        if col in df:
+            df[col] = _to_int(df[col], dtype)
+    return df
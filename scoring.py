@@ -0,0 +1,367 @@
+"""Claim-risk scores: claim probability and expected claim amount per policy.
+
+    python scoring.py train                                   # fit on the cleaned dataset
+    python scoring.py score policies.parquet scores.parquet --chunksize 250000
+
+Two gradient-boosted models are fitted on the cleaned features: a classifier
+for ``claim_flag`` and a gamma regressor for ``clm_amt`` among the policies
+that claimed. A policy's expected claim amount is its claim probability
+times its expected amount given a claim. Before the final fit each model is
+cross-validated with its folds on a process pool; the fold scores and the
+out-of-fold scores of the training rows are kept with the model.
+
+A model is versioned by the dataset version and this file's hash and saved
+under artifacts/models. ``request_model`` trains a missing one on a
+background thread (the Risk Scores page shows that it is training
+meanwhile); ``load_model`` waits for it. The scores of the cleaned dataset
+are stored under artifacts/scores for the Risk Scores page.
+
+Scoring streams a CSV or Parquet file in chunks: each chunk is encoded into
+one float32 matrix (numeric columns and flags as numbers, categoricals as
+their codes in the schema's category order, read natively by the models),
+scored and appended to the output Parquet file.
+"""
+
+import argparse
+import datetime
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sklearn
+from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+from sklearn.model_selection import KFold, StratifiedKFold, cross_validate
+
+import data
+import schema
+
+MODEL_DIR = data.BASE_DIR / 'artifacts' / 'models'
+SCORE_DIR = data.BASE_DIR / 'artifacts' / 'scores'
+
+NUMERIC = ['kidsdriv', 'age', 'homekids', 'yoj', 'income', 'home_val', 'travtime', 'bluebook',
+           'tif', 'oldclaim', 'clm_freq', 'mvr_pts', 'car_age']
+FLAGS = schema.FLAGS
+CATEGORICAL = list(schema.CATEGORIES)
+FEATURES = NUMERIC + FLAGS + CATEGORICAL
+TARGETS = ['claim_flag', 'clm_amt']
+SCORES = ['claim_probability', 'expected_severity', 'expected_clm_amt']
+
+N_FOLDS = 5
+CHUNKSIZE = 250_000
+CLASSIFIER_SCORING = {'roc_auc': 'roc_auc', 'log_loss': 'neg_log_loss', 'brier': 'neg_brier_score'}
+SEVERITY_SCORING = {'mae': 'neg_mean_absolute_error', 'r2': 'r2'}
+
+RETRY_SECONDS = 30
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scoring')
+_lock = threading.Lock()
+_models = {}     # model version -> RiskModel
+_trainings = {}  # model version -> Training
+_scores = {}  # model version -> scores of the cleaned dataset
+
+
+def encode(df):
+    """The feature matrix of a cleaned frame: float32, categoricals as codes, NaN when missing."""
+    x = np.empty((len(df), len(FEATURES)), dtype='float32')
+    for j, col in enumerate(NUMERIC):
+        x[:, j] = df[col].to_numpy(dtype='float32', na_value=np.nan)
+    offset = len(NUMERIC)
+    for j, col in enumerate(FLAGS, offset):
+        x[:, j] = schema.to_flag(df[col]).to_numpy(dtype='float32', na_value=np.nan)
+    offset += len(FLAGS)
+    for j, col in enumerate(CATEGORICAL, offset):
+        codes = pd.Categorical(df[col], categories=schema.CATEGORIES[col]).codes.astype('float32')
+        # Values outside the schema's categories count as missing
+        codes[codes < 0] = np.nan
+        x[:, j] = codes
+    return x
+
+
+def _estimators(random_state):
+    categorical = np.isin(FEATURES, CATEGORICAL)
+    classifier = HistGradientBoostingClassifier(
+        learning_rate=0.05, max_iter=300, categorical_features=categorical,
+        early_stopping=True, random_state=random_state)
+    severity = HistGradientBoostingRegressor(
+        loss='gamma', learning_rate=0.05, max_iter=200, categorical_features=categorical,
+        early_stopping=True, random_state=random_state)
+    return classifier, severity
+
+
+def _cv_summary(results, scoring):
+    summary = {}
+    for name, scorer in scoring.items():
+        values = results[f'test_{name}']
+        # sklearn maximizes every score; report losses as positive numbers
+        if scorer.startswith('neg_'):
+            values = -values
+        summary[name] = {'mean': float(values.mean()), 'std': float(values.std())}
+    return summary
+
+
+def _out_of_fold(severity, x, claimed, flag_cv, severity_cv):
+    """Scores of the training rows, each from the fold models that did not see it.
+
+    The severity folds only hold the policies that claimed; the others were
+    never trained on and take the final severity model's prediction.
+    """
+    probability = np.empty(len(x))
+    for estimator, test in zip(flag_cv['estimator'], flag_cv['indices']['test']):
+        probability[test] = estimator.predict_proba(x[test])[:, 1]
+    expected_severity = severity.predict(x)
+    claimed_rows = np.flatnonzero(claimed)
+    for estimator, test in zip(severity_cv['estimator'], severity_cv['indices']['test']):
+        expected_severity[claimed_rows[test]] = estimator.predict(x[claimed_rows[test]])
+    return pd.DataFrame({
+        'claim_probability': probability.astype('float32'),
+        'expected_severity': expected_severity.astype('float32'),
+        'expected_clm_amt': (probability * expected_severity).astype('float32'),
+    })
+
+
+class RiskModel:
+    """Claim probability and severity models fitted on the cleaned dataset."""
+
+    def __init__(self, random_state=0):
+        self.random_state = random_state
+        self.throughput = None
+
+    def fit(self, df, n_folds=N_FOLDS, n_jobs=None):
+        """Cross-validate both models (folds run in parallel), then fit them on all of ``df``."""
+        start = time.perf_counter()
+        x = encode(df)
+        claimed = df['claim_flag'].to_numpy() == 1
+        y_flag = claimed.astype('int8')
+        y_amount = df['clm_amt'].to_numpy(dtype='float64')[claimed]
+        self.classifier, self.severity = _estimators(self.random_state)
+
+        flag_cv = cross_validate(
+            self.classifier, x, y_flag, scoring=CLASSIFIER_SCORING, n_jobs=n_jobs,
+            cv=StratifiedKFold(n_folds, shuffle=True, random_state=self.random_state),
+            return_estimator=True, return_indices=True)
+        severity_cv = cross_validate(
+            self.severity, x[claimed], y_amount, scoring=SEVERITY_SCORING, n_jobs=n_jobs,
+            cv=KFold(n_folds, shuffle=True, random_state=self.random_state),
+            return_estimator=True, return_indices=True)
+        self.cv_ = {'claim_flag': _cv_summary(flag_cv, CLASSIFIER_SCORING),
+                    'clm_amt': _cv_summary(severity_cv, SEVERITY_SCORING)}
+
+        self.classifier.fit(x, y_flag)
+        self.severity.fit(x[claimed], y_amount)
+        self.out_of_fold_ = _out_of_fold(self.severity, x, claimed, flag_cv, severity_cv)
+        self.n_rows_ = len(df)
+        self.claim_rate_ = float(y_flag.mean())
+        self.trained_ = datetime.datetime.now().isoformat(timespec='seconds')
+        self.sklearn_version_ = sklearn.__version__
+        self.fit_seconds_ = time.perf_counter() - start
+        return self
+
+    def predict(self, df):
+        """Scores of every row of a cleaned frame, as float32 columns."""
+        x = encode(df)
+        probability = self.classifier.predict_proba(x)[:, 1]
+        severity = self.severity.predict(x)
+        return pd.DataFrame({
+            'claim_probability': probability.astype('float32'),
+            'expected_severity': severity.astype('float32'),
+            'expected_clm_amt': (probability * severity).astype('float32'),
+        }, index=df.index)
+
+    def score_chunks(self, chunks):
+        """Score an iterable of frames, yielding each chunk's scores; sets ``throughput``."""
+        start = time.perf_counter()
+        rows = 0
+        for chunk in chunks:
+            scores = self.predict(chunk)
+            rows += len(scores)
+            self.throughput = rows / (time.perf_counter() - start)
+            yield scores
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so a model file that exists is complete
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(tmp, path)
+        return path
+
+
+def model_version():
+    """Version of the model for the current dataset: its version and this file's hash."""
+    return data.combine_versions([data.dataset_version('cleaned'), data.file_version(__file__)])
+
+
+def model_path(version):
+    return MODEL_DIR / f'{version[:16]}.pkl'
+
+
+def _train(version, n_folds, n_jobs):
+    model = RiskModel().fit(data.load_cleaned(FEATURES + TARGETS), n_folds, n_jobs)
+    model.version = version
+    model.save(model_path(version))
+    return model
+
+
+def train(n_folds=N_FOLDS, n_jobs=-1):
+    """Fit and save the model of the current cleaned dataset."""
+    version = model_version()
+    model = _train(version, n_folds, n_jobs)
+    with _lock:
+        _models[version] = model
+    return model
+
+
+class Training:
+    """A background fit of the model of one dataset version."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.error = None
+        self.failed_at = None
+        self.future = None
+
+
+def _run_training(version, training):
+    try:
+        model = _train(version, N_FOLDS, -1)
+    except Exception as exc:
+        training.error = exc
+        training.failed_at = time.monotonic()
+        return
+    with _lock:
+        _models[version] = model
+
+
+def request_model():
+    """Return ``(model, training)``: the current model, or the background training producing it.
+
+    A failed training is reported for RETRY_SECONDS; the first request after
+    that starts it again.
+    """
+    version = model_version()
+    with _lock:
+        if version in _models:
+            return _models[version], None
+        path = model_path(version)
+        if path.exists():
+            _models[version] = load_model(path)
+            return _models[version], None
+        training = _trainings.get(version)
+        if training is None or (training.error is not None
+                                and time.monotonic() - training.failed_at > RETRY_SECONDS):
+            training = Training()
+            training.future = _executor.submit(_run_training, version, training)
+            _trainings[version] = training
+        return None, training
+
+
+def load_model(path=None):
+    """A saved model, or the model of the current dataset (waiting for its training on first use)."""
+    if path is not None:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    model, training = request_model()
+    if model is None:
+        training.future.result()
+        if training.error is not None:
+            raise training.error
+        model, _ = request_model()
+    return model
+
+
+def score_path(version):
+    return SCORE_DIR / f'{version[:16]}.parquet'
+
+
+def load_scores(model=None, out_of_fold=False):
+    """Scores of every row of the cleaned dataset, computed once per model version.
+
+    ``out_of_fold`` gives the cross-validation scores instead, each row scored
+    by models fitted without it, for comparing scores with observed claims.
+    """
+    model = model or load_model()
+    if out_of_fold:
+        return model.out_of_fold_
+    with _lock:
+        if model.version not in _scores:
+            path = score_path(model.version)
+            if path.exists():
+                scores = pd.read_parquet(path)
+            else:
+                scores = model.predict(data.load_cleaned(FEATURES)).reset_index(drop=True)
+                SCORE_DIR.mkdir(parents=True, exist_ok=True)
+                scores.to_parquet(path)
+            _scores[model.version] = scores
+        return _scores[model.version]
+
+
+def iter_chunks(path, chunksize=CHUNKSIZE):
+    """Cleaned policies from a CSV or Parquet file, ``chunksize`` rows at a time."""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        parquet = pq.ParquetFile(path)
+        columns = [col for col in FEATURES if col in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(path, index_col=0, chunksize=chunksize):
+            yield schema.apply_cleaned(chunk)
+
+
+def score_file(model, source, output, chunksize=CHUNKSIZE):
+    """Stream ``source`` through the model into an output Parquet file; returns the rows scored."""
+    rows = 0
+    writer = None
+    try:
+        for scores in model.score_chunks(iter_chunks(source, chunksize)):
+            scores.insert(0, 'row', np.arange(rows, rows + len(scores)))
+            table = pa.Table.from_pandas(scores, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output, table.schema)
+            writer.write_table(table)
+            rows += len(scores)
+            print(f"  {rows:,} rows, {model.throughput:,.0f} rows/sec")
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    fit = commands.add_parser('train', help='fit the models on the cleaned dataset')
+    fit.add_argument('--folds', type=int, default=N_FOLDS, help='cross-validation folds')
+    fit.add_argument('--jobs', type=int, default=None, help='parallel folds (default: one per CPU)')
+    score = commands.add_parser('score', help='score a file of cleaned policies')
+    score.add_argument('source', help='cleaned policies (CSV or Parquet)')
+    score.add_argument('output', help='scores (Parquet)')
+    score.add_argument('--model', default=None, help='saved model (default: the current dataset\'s)')
+    score.add_argument('--chunksize', type=int, default=CHUNKSIZE, help='rows per chunk')
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        model = train(args.folds, args.jobs or -1)
+        print(f"Saved model {model.version[:16]} to {model_path(model.version)} ({model.fit_seconds_:.1f}s)")
+        for target, scores in model.cv_.items():
+            print(f"  {target}: " + ', '.join(f"{name} {s['mean']:.4f} ± {s['std']:.4f}"
+                                               for name, s in scores.items()))
+    else:
+        model = load_model(args.model)
+        rows = score_file(model, args.source, args.output, args.chunksize)
+        print(f"Scored {rows:,} policies at {model.throughput:,.0f} rows/sec into {args.output}")
+
+
+if __name__ == '__main__':
+    # Run through the importable module so pickles reference scoring.RiskModel
+    import scoring
+    scoring.main()
@@ -0,0 +1,690 @@
+"""The analyses shown on the pages, as functions of the rows they cover.
+
+Each builder takes a ``Scope`` and returns a ``Section``: its title, figures,
+insight text and (for the KPI blocks) metrics. The Streamlit pages render
+them (render.py) and report.py writes them to static HTML/JSON, so a
+scheduled report shows exactly what the pages show.
+
+``Scope.current()`` is the whole cleaned dataset and reads the cached
+artifacts (aggregate cube, column statistics, correlation matrix, column
+profiles). ``Scope(frame, label)`` covers any subset of rows, e.g. one
+``urbanicity`` segment, and computes the same artifacts from those rows;
+``Scope(positions=...)`` does the same for rows of the current dataset
+picked by the sidebar filters; with ``APP_ENGINE`` set to duckdb or polars
+its group summaries, value counts, KPIs and correlations are answered by
+that query engine from the filter ``selection`` instead (engines.py).
+"""
+
+import threading
+from collections import namedtuple
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+import column_profile
+import column_stats
+import correlation
+import cube
+import data
+import engines
+import figure_cache
+import schema
+import scoring
+from column_stats import Histogram, histogram_figure
+from scatter import scatter_figure
+
+_lock = threading.Lock()
+_current = {}  # dataset version -> Scope of the whole dataset
+
+Section = namedtuple('Section', ['name', 'title', 'figures', 'insights', 'metrics', 'table'],
+                     defaults=((), '', (), None))
+
+COLUMN_DESCRIPTIONS = {
+    'kidsdriv': 'Number of children who drive',
+    'age': 'Age of the primary driver',
+    'homekids': 'Number of children at home',
+    'yoj': 'Years on current job',
+    'income': 'Annual income of the customer',
+    'parent1': 'Indicator if the customer is a single parent (Yes/No)',
+    'home_val': 'Value of the home owned by the customer',
+    'mstatus': 'Marital status of the customer (Yes/No for married)',
+    'gender': 'Gender of the customer (M/F)',
+    'education': 'Education level of the customer',
+    'occupation': 'Occupation of the customer',
+    'travtime': 'Travel time to work in minutes',
+    'car_use': 'Primary use of the car (Private/Commercial)',
+    'bluebook': 'Value of the car (blue book value)',
+    'tif': 'Time in force - length of time the policy has been in effect',
+    'car_type': 'Type of car (e.g., Minivan, SUV, Sports Car)',
+    'red_car': 'Indicator if the car is red (yes/no)',
+    'oldclaim': 'Amount of previous claims',
+    'clm_freq': 'Frequency of claims',
+    'revoked': 'Indicator if the license was ever revoked (Yes/No)',
+    'mvr_pts': 'Motor vehicle record points',
+    'clm_amt': 'Amount of the current claim',
+    'car_age': 'Age of the car in years',
+    'claim_flag': 'Indicator if a claim was made (0/1)',
+    'urbanicity': 'Urbanicity level of the customer\'s location',
+    'Customer_Loyalty': 'Customer loyalty category'
+}
+
+
+class Scope:
+    """The rows an analysis covers and the artifacts derived from them."""
+
+    def __init__(self, frame=None, label='All customers', positions=None, selection=()):
+        self.frame = frame          # rows given directly, e.g. one report segment
+        self.positions = positions  # or positions of rows in the current dataset (filters.py)
+        self.selection = selection  # and the filters that picked them
+        self.label = label
+        self.version = data.dataset_version('cleaned')
+        self._matrices = {}
+
+    @classmethod
+    def current(cls):
+        """The whole current dataset; one shared Scope per dataset version."""
+        version = data.dataset_version('cleaned')
+        with _lock:
+            if version not in _current:
+                _current.clear()
+                _current[version] = cls()
+            return _current[version]
+
+    def section(self, build, *args):
+        """``build(self, *args)`` with its figures as JSON, shared by reruns, sessions and processes."""
+        return figure_cache.cached_section(self, build, *args)
+
+    @property
+    def filters(self):
+        """What picked the rows, for cache keys: the filter selection, else the label."""
+        return [list(item) for item in self.selection] if self.selection else self.label
+
+    @property
+    def whole(self):
+        return self.frame is None and self.positions is None
+
+    def rows(self, columns=None):
+        if self.frame is not None:
+            return self.frame if columns is None else self.frame[list(columns)]
+        df = data.load_cleaned(columns)
+        return df if self.positions is None else df.take(self.positions)
+
+    @cached_property
+    def n_rows(self):
+        return len(self.rows([])) if self.positions is None else len(self.positions)
+
+    @cached_property
+    def cube(self):
+        return cube.load_cube() if self.whole else cube.build(self.rows(cube.COLUMNS))
+
+    @cached_property
+    def stats(self):
+        if self.whole:
+            return column_stats.load_stats()
+        columns = schema.numeric_columns()
+        return column_stats.compute(self.rows(columns), columns)
+
+    @cached_property
+    def profile(self):
+        return column_profile.load_profile() if self.whole else column_profile.profile_frame(self.rows())
+
+    def risk(self, out_of_fold=False):
+        """Risk scores of this scope's rows (scoring.py) next to their observed claims.
+
+        ``out_of_fold`` takes the cross-validation scores, which were not fitted on the rows they score.
+        """
+        scores = scoring.load_scores(out_of_fold=out_of_fold)
+        if self.frame is not None:
+            scores = scores.loc[self.frame.index]
+        elif self.positions is not None:
+            scores = scores.take(self.positions)
+        observed = self.rows(['claim_flag', 'clm_amt', 'car_type'])
+        return scores.set_axis(observed.index).join(observed)
+
+    @cached_property
+    def engine(self):
+        """The query engine answering this segment's aggregations (None: computed from its rows)."""
+        if self.selection and engines.get().name != 'pandas':
+            return engines.get()
+        return None
+
+    def summary(self, dimension):
+        if self.engine:
+            return self.engine.summary(dimension, self.selection)
+        return cube.summary(self.cube, dimension)
+
+    def value_counts(self, column):
+        if self.engine:
+            return self.engine.value_counts(column, self.selection)
+        return self.rows([column])[column].value_counts()
+
+    def describe(self, columns):
+        """describe() statistics, sum and zero count of numeric columns."""
+        if self.engine:
+            return self.engine.describe(columns, self.selection)
+        return self.stats.table[list(columns)]
+
+    def matrix(self, method='pearson'):
+        if self.whole:
+            return correlation.load_matrix(method)
+        if self.engine:
+            if method not in self._matrices:
+                self._matrices[method] = self.engine.correlation(schema.numeric_columns(), method, self.selection)
+            return self._matrices[method]
+        if method not in self._matrices:
+            numeric = self.rows(schema.numeric_columns())
+            self._matrices[method] = (correlation.spearman(numeric) if method == 'spearman'
+                                      else correlation.pearson(numeric))
+        return self._matrices[method]
+
+
+def _value(table, key_column, key, value_column):
+    # A group can be missing from a segment; its values then read as NaN
+    match = table.loc[table[key_column] == key, value_column]
+    return match.iloc[0] if len(match) else np.nan
+
+
+# Approximate answers (approx.py) come with the half-widths of their confidence intervals
+
+def _plus_minus(stats, statistic):
+    interval = f'{statistic}_ci'
+    return f" ± ${stats[interval]:,.2f}" if interval in stats.index else ""
+
+
+def _error_bars(fig, summary, measure):
+    """Error bars on the bars of a group summary's means, when the summary is approximate."""
+    interval = f'{measure}_mean_ci'
+    if interval in summary:
+        for trace in fig.data:
+            trace.error_y = {'type': 'data', 'array': summary[interval].reindex(list(map(str, trace.x))).to_numpy()}
+    return fig
+
+
+# Home
+
+HOME_DESCRIPTION = """
+This dataset contains information about car insurance customers, their demographics, vehicle details, and claim history. 
+It is used for analyzing factors that influence insurance claims and customer behavior. 
+The data has been cleaned and processed for analysis.
+"""
+
+
+def overview(scope):
+    df = scope.rows()
+    memory = df.memory_usage(deep=True, index=False).sum()
+    return Section('Overview', 'Dataset Overview', insights=(
+        f"Number of rows: {df.shape[0]}\n\n"
+        f"Number of columns: {df.shape[1]}\n\n"
+        f"Memory: {memory / 2 ** 20:,.1f} MB ({memory / max(len(df), 1):,.0f} bytes per row)"), table=df.head())
+
+
+def catalog_entry(profile):
+    """Markdown lines describing one column of the column catalog."""
+    lines = [f"Data type: {profile.dtype}",
+             f"Unique values: {'' if profile.distinct.exact else '~'}{profile.unique}"]
+    if profile.numeric:
+        lines.append(f"Min: {profile.min}, Max: {profile.max}, Mean: {profile.mean:.2f}")
+    return lines
+
+
+def column_catalog(scope):
+    profile = scope.profile
+    entries = []
+    for col, desc in COLUMN_DESCRIPTIONS.items():
+        lines = [f"#### {col}", desc]
+        if col in profile:
+            lines += catalog_entry(profile[col])
+        entries.append("\n\n".join(lines))
+    return Section('Column catalog', 'Column Descriptions', insights="\n\n---\n\n".join(entries))
+
+
+HOME = [overview, column_catalog]
+
+
+# Univariate Analysis
+
+def kpis(scope):
+    claims = scope.describe(['clm_amt'])['clm_amt']
+    return Section('KPIs', 'Key Performance Indicators (KPIs)', metrics=(
+        ("Total Records", scope.n_rows),
+        ("Average Claim Amount", f"${claims['mean']:,.2f}{_plus_minus(claims, 'mean')}"),
+        ("Total Claim Amount", f"${claims['sum']:,.2f}{_plus_minus(claims, 'sum')}"),
+    ))
+
+
+def numeric_column(scope, column):
+    """Histogram and statistics of one numeric column (the column explorer)."""
+    stats = scope.stats
+    values = stats[column]
+    fig = histogram_figure(stats.histogram(column, 30), title=f"Distribution of {column}", label=column)
+    return Section(column, f"Statistics for {column}", figures=(fig,), insights=f"""
+    **Q: What is the distribution shape of {column}?**
+    - Mean: ${values['mean']:,.2f}
+    - Median: ${values['50%']:,.2f}
+    - Std Dev: ${values['std']:,.2f}
+
+    **Q: Are there any outliers in {column}?**
+    - Min: ${values['min']:,.2f}
+    - Max: ${values['max']:,.2f}
+    - Range: ${values['max'] - values['min']:,.2f}
+    - IQR: ${values['75%'] - values['25%']:,.2f}
+
+    **Q: What percentage of records have zero value?**
+    - Zero Count: {values['zeros']:.0f} ({values['zeros'] / stats.n_rows * 100:.2f}%)
+    """, table=stats.describe(column))
+
+
+def categorical_column(scope, column):
+    """Value counts of one categorical column (the column explorer)."""
+    value_counts = scope.value_counts(column)
+    if column in schema.FLAGS:
+        value_counts.index = schema.flag_labels(value_counts.index.to_series())
+    value_counts = value_counts.reset_index()
+    value_counts.columns = [column, 'Count']
+
+    fig = px.bar(value_counts,
+                 x=column,
+                 y='Count',
+                 title=f"Distribution of {column}",
+                 labels={'Count': 'Frequency'})
+    total_records = scope.n_rows
+    return Section(column, f"Value Counts for {column}", figures=(fig,), insights=f"""
+    **Q: What is the most common category in {column}?**
+    - Top Category: {value_counts.iloc[0][column]} ({value_counts.iloc[0]['Count']} records, {value_counts.iloc[0]['Count'] / total_records * 100:.2f}%)
+
+    **Q: How diverse is the {column} distribution?**
+    - Unique Categories: {len(value_counts)}
+    - Diversity Index: {1 - (value_counts['Count'].max() / total_records):.2f}
+
+    **Q: What percentage do top 3 categories represent?**
+    - Top 3 Total: {value_counts['Count'].head(3).sum()} records ({value_counts['Count'].head(3).sum() / total_records * 100:.2f}%)
+    """, table=value_counts)
+
+
+def age_distribution(scope):
+    age_stats = scope.stats['age']
+    fig = histogram_figure(scope.stats.histogram('age', 40), title="Age Distribution", label='Age (years)')
+    return Section('Age Distribution', "Age Distribution Analysis", (fig,), f"""
+    **Q: What is the age profile of our customers?**
+    - Average Age: {age_stats['mean']:.1f} years
+    - Median Age: {age_stats['50%']:.1f} years
+
+    **Q: What age groups do we have?**
+    - Youngest: {age_stats['min']:.0f} years
+    - Oldest: {age_stats['max']:.0f} years
+    - Age Range: {age_stats['max'] - age_stats['min']:.0f} years
+    """)
+
+
+def income_distribution(scope):
+    income_stats = scope.stats['income']
+    fig = histogram_figure(scope.stats.histogram('income', 50), title="Income Distribution", label='Income ($)')
+    return Section('Income Distribution', "Income Distribution Analysis", (fig,), f"""
+    **Q: What is the income distribution of our customer base?**
+    - Average Income: ${income_stats['mean']:,.0f}
+    - Median Income: ${income_stats['50%']:,.0f}
+
+    **Q: Are there significant income variations?**
+    - Min Income: ${income_stats['min']:,.0f}
+    - Max Income: ${income_stats['max']:,.0f}
+    - Std Dev: ${income_stats['std']:,.0f}
+    """)
+
+
+def gender_distribution(scope):
+    gender_counts = scope.value_counts('gender').reset_index()
+    gender_counts.columns = ['Gender', 'Count']
+
+    fig_bar = px.bar(gender_counts, x='Gender', y='Count',
+                     title="Gender Distribution",
+                     labels={'Count': 'Number of Customers'})
+    fig_pie = px.pie(gender_counts, values='Count', names='Gender',
+                     title="Gender Proportion")
+    total = gender_counts['Count'].sum()
+    shares = "\n".join(f"    - {row.Gender}: {row.Count} ({row.Count / total * 100:.1f}%)"
+                       for row in gender_counts.itertuples())
+    return Section('Gender Distribution', "Gender Distribution Analysis", (fig_bar, fig_pie), f"""
+    **Q: What is the gender composition of our customer base?**
+    - Total Customers: {total}
+{shares}
+    """)
+
+
+def claim_frequency(scope):
+    stats = scope.stats
+    clm_freq_stats = stats['clm_freq']
+    fig = histogram_figure(stats.histogram('clm_freq', 20),
+                           title="Claim Frequency Distribution", label='Number of Claims')
+    return Section('Claim Frequency', "Claim Frequency Analysis", (fig,), f"""
+    **Q: What is the typical claim frequency?**
+    - Average Claims: {clm_freq_stats['mean']:.2f}
+    - Median Claims: {clm_freq_stats['50%']:.0f}
+
+    **Q: How many customers have never filed a claim?**
+    - No Claims: {clm_freq_stats['zeros']:.0f} customers ({clm_freq_stats['zeros']/stats.n_rows*100:.1f}%)
+    - 1+ Claims: {clm_freq_stats['count'] - clm_freq_stats['zeros']:.0f} customers ({(clm_freq_stats['count'] - clm_freq_stats['zeros'])/stats.n_rows*100:.1f}%)
+    """)
+
+
+def years_on_job(scope):
+    yoj_stats = scope.stats['yoj']
+    fig = histogram_figure(scope.stats.histogram('yoj', 30),
+                           title="Years on Job Distribution", label='Years on Job')
+    return Section('Years on Job', "Years on Job Analysis", (fig,), f"""
+    **Q: What is the job tenure profile?**
+    - Average Years: {yoj_stats['mean']:.1f}
+    - Median Years: {yoj_stats['50%']:.1f}
+
+    **Q: Employee stability insights?**
+    - Min Years: {yoj_stats['min']:.0f}
+    - Max Years: {yoj_stats['max']:.0f}
+    """)
+
+
+UNIVARIATE_FEATURED = [age_distribution, income_distribution, gender_distribution, claim_frequency, years_on_job]
+
+
+# Multivariate Analysis
+
+def claims_by_age(scope, figures=True):
+    corr_matrix = scope.matrix()
+    figs = (scatter_figure(scope.rows(['age', 'clm_amt']), x='age', y='clm_amt',
+                           title="Claim Amount vs Age",
+                           labels={'age': 'Age (years)', 'clm_amt': 'Claim Amount ($)'}),) if figures else ()
+    return Section('Question 1', "1. How does Claim Amount vary with Customer Age?", figs, f"""
+    - Correlation: {corr_matrix.loc['age', 'clm_amt']:.3f}
+    - Average claim by age group shows the relationship between customer age and claim amounts
+    - Trend line helps identify if older or younger customers tend to have higher claims
+    """)
+
+
+def claims_by_income(scope, figures=True):
+    corr_matrix = scope.matrix()
+    figs = (scatter_figure(scope.rows(['income', 'clm_amt']), x='income', y='clm_amt',
+                           title="Claim Amount vs Income",
+                           labels={'income': 'Income ($)', 'clm_amt': 'Claim Amount ($)'}),) if figures else ()
+    return Section('Question 2', "2. What is the relationship between Customer Income and Claim Amount?", figs, f"""
+    - Correlation: {corr_matrix.loc['income', 'clm_amt']:.3f}
+    - Understanding if higher income customers file larger claims
+    - Income level may indicate car value and thus claim amounts
+    """)
+
+
+def income_by_age_group(scope):
+    age_summary = scope.summary('age_group')
+    age_income = age_summary['income_mean'].reset_index()
+    age_income.columns = ['Age Group', 'Average Income']
+
+    fig = _error_bars(px.bar(age_income, x='Age Group', y='Average Income',
+                             title="Average Income by Age Group",
+                             labels={'Average Income': 'Income ($)'}), age_summary, 'income')
+    return Section('Question 3', "3. How does Customer Income vary across Age Groups?", (fig,), f"""
+    - Younger customers (18-30) avg income: ${age_summary['income_mean'].get('18-30', np.nan):,.0f}
+    - Peak earning age group avg income: ${age_income['Average Income'].max():,.0f}
+    - Income typically increases with age up to a point, then may stabilize or decrease
+    """)
+
+
+def claim_frequency_by_age_group(scope):
+    age_summary = scope.summary('age_group')
+    age_claims = age_summary['clm_freq_mean'].reset_index()
+    age_claims.columns = ['Age Group', 'Average Claim Frequency']
+
+    fig = _error_bars(px.bar(age_claims, x='Age Group', y='Average Claim Frequency',
+                             title="Average Claim Frequency by Age Group",
+                             labels={'Average Claim Frequency': 'Average Number of Claims'}),
+                      age_summary, 'clm_freq')
+    return Section('Question 4', "4. How does Claim Frequency vary with Customer Age?", (fig,), f"""
+    - Correlation: {scope.matrix().loc['age', 'clm_freq']:.3f}
+    - Risk profile changes across age groups
+    - Younger drivers may have different claim patterns than older drivers
+    """)
+
+
+def claims_by_gender(scope):
+    gender_summary = scope.summary('gender')
+    gender_claims = gender_summary[['clm_amt_mean', 'clm_freq_mean']].reset_index()
+    gender_claims.columns = ['Gender', 'Avg Claim Amount', 'Avg Claim Frequency']
+
+    fig_amount = _error_bars(px.bar(gender_claims, x='Gender', y='Avg Claim Amount',
+                                    title="Average Claim Amount by Gender",
+                                    labels={'Avg Claim Amount': 'Claim Amount ($)'}), gender_summary, 'clm_amt')
+    fig_frequency = _error_bars(px.bar(gender_claims, x='Gender', y='Avg Claim Frequency',
+                                       title="Average Claim Frequency by Gender",
+                                       labels={'Avg Claim Frequency': 'Number of Claims'}),
+                                gender_summary, 'clm_freq')
+    return Section('Question 5', "5. Do Male and Female Customers have Different Claim Patterns?",
+                   (fig_amount, fig_frequency), f"""
+    - Male customers avg claim amount: ${_value(gender_claims, 'Gender', 'M', 'Avg Claim Amount'):,.2f}
+    - Female customers avg claim amount: ${_value(gender_claims, 'Gender', 'F', 'Avg Claim Amount'):,.2f}
+    - Gender differences in claim behavior may indicate different risk profiles
+    """)
+
+
+def claims_by_car_type(scope):
+    car_summary = scope.summary('car_type')
+    car_claims = car_summary[['clm_amt_mean', 'clm_amt_count']].reset_index()
+    car_claims.columns = ['Car Type', 'Avg Claim Amount', 'Count']
+    car_claims = car_claims.sort_values('Avg Claim Amount', ascending=False)
+
+    fig = _error_bars(px.bar(car_claims, x='Car Type', y='Avg Claim Amount',
+                             title="Average Claim Amount by Vehicle Type",
+                             labels={'Avg Claim Amount': 'Claim Amount ($)', 'Car Type': 'Vehicle Type'},
+                             color='Avg Claim Amount'), car_summary, 'clm_amt')
+    return Section('Question 6', "6. Which Vehicle Types have the Highest Average Claims?", (fig,), f"""
+    - Highest claim vehicle: {car_claims.iloc[0]['Car Type']} (${car_claims.iloc[0]['Avg Claim Amount']:,.2f})
+    - Lowest claim vehicle: {car_claims.iloc[-1]['Car Type']} (${car_claims.iloc[-1]['Avg Claim Amount']:,.2f})
+    - Vehicle type is a key factor in determining claim amounts
+    """)
+
+
+def claims_by_education(scope):
+    education_summary = scope.summary('education')
+    education_claims = education_summary[['clm_amt_mean', 'clm_amt_count']].reset_index()
+    education_claims.columns = ['Education', 'Avg Claim Amount', 'Count']
+    education_claims = education_claims.sort_values('Avg Claim Amount', ascending=False)
+
+    fig = _error_bars(px.bar(education_claims, x='Education', y='Avg Claim Amount',
+                             title="Average Claim Amount by Education Level",
+                             labels={'Avg Claim Amount': 'Claim Amount ($)'},
+                             color='Avg Claim Amount'), education_summary, 'clm_amt')
+    return Section('Question 7', "7. How does Education Level Impact Claim Amounts?", (fig,), f"""
+    - Highest claim education group: {education_claims.iloc[0]['Education']} (${education_claims.iloc[0]['Avg Claim Amount']:,.2f})
+    - Education may correlate with income and vehicle type
+    - Better educated drivers may own more expensive vehicles
+    """)
+
+
+def claim_frequency_by_marital_status(scope):
+    mstatus_summary = scope.summary('mstatus')
+    mstatus_claims = mstatus_summary['clm_freq_mean'].reset_index()
+    mstatus_claims.columns = ['Marital Status', 'Avg Claim Frequency']
+
+    fig = _error_bars(px.bar(mstatus_claims, x='Marital Status', y='Avg Claim Frequency',
+                             title="Average Claim Frequency by Marital Status",
+                             labels={'Avg Claim Frequency': 'Number of Claims'}), mstatus_summary, 'clm_freq')
+    return Section('Question 8', "8. Does Marital Status Affect Claim Frequency?", (fig,), """
+    - Marital status may indicate lifestyle and driving patterns
+    - Married individuals may have different risk profiles
+    - Family status can affect claim behavior
+    """)
+
+
+def claims_by_car_use(scope):
+    car_use_summary = scope.summary('car_use')
+    car_use_claims = car_use_summary[['clm_amt_mean', 'clm_amt_count']].reset_index()
+    car_use_claims.columns = ['Car Use', 'Avg Claim Amount', 'Count']
+
+    fig = _error_bars(px.bar(car_use_claims, x='Car Use', y='Avg Claim Amount',
+                             title="Average Claim Amount by Vehicle Use Type",
+                             labels={'Avg Claim Amount': 'Claim Amount ($)', 'Car Use': 'Use Type'}),
+                      car_use_summary, 'clm_amt')
+    return Section('Question 9', "9. How does Vehicle Usage Type Impact Claim Amounts?", (fig,), f"""
+    - Commercial vehicles: ${_value(car_use_claims, 'Car Use', 'Commercial', 'Avg Claim Amount'):,.2f}
+    - Private vehicles: ${_value(car_use_claims, 'Car Use', 'Private', 'Avg Claim Amount'):,.2f}
+    - Business vs personal use drives different claim patterns
+    """)
+
+
+def claims_by_job_tenure(scope):
+    corr_matrix = scope.matrix()
+    tenure_summary = scope.summary('job_tenure_group')
+    job_tenure = tenure_summary[['clm_freq_mean', 'clm_amt_mean']].reset_index()
+    job_tenure.columns = ['Job Tenure', 'Avg Claim Frequency', 'Avg Claim Amount']
+
+    fig_frequency = _error_bars(px.bar(job_tenure, x='Job Tenure', y='Avg Claim Frequency',
+                                       title="Claim Frequency by Job Tenure",
+                                       labels={'Avg Claim Frequency': 'Number of Claims'}),
+                                tenure_summary, 'clm_freq')
+    fig_amount = _error_bars(px.bar(job_tenure, x='Job Tenure', y='Avg Claim Amount',
+                                    title="Claim Amount by Job Tenure",
+                                    labels={'Avg Claim Amount': 'Claim Amount ($)'}), tenure_summary, 'clm_amt')
+    return Section('Question 10', "10. How do Employment Stability and Claim Patterns Correlate?",
+                   (fig_frequency, fig_amount), f"""
+    - Employees with longer tenure show different risk patterns
+    - Job stability may indicate overall stability and reliability
+    - More established employees may have different vehicle choices and claim patterns
+    - Correlation (YOJ vs Claim Freq): {corr_matrix.loc['yoj', 'clm_freq']:.3f}
+    - Correlation (YOJ vs Claim Amount): {corr_matrix.loc['yoj', 'clm_amt']:.3f}
+    """)
+
+
+def correlation_matrix(scope, method='Pearson'):
+    matrix = scope.matrix(method.lower())
+    fig = px.imshow(matrix.round(2), text_auto=True, aspect='auto',
+                    color_continuous_scale='RdBu_r', zmin=-1, zmax=1,
+                    title=f"{method} Correlation Matrix")
+    fig.update_layout(height=700)
+    pairs = matrix.where(np.triu(np.ones(matrix.shape, dtype=bool), k=1)).stack()
+    strongest = pairs.abs().sort_values(ascending=False).index[:3]
+    insights = "\n".join(f"- {a} vs {b}: {pairs[(a, b)]:.3f}" for a, b in strongest)
+    insights += ("\n- Spearman correlation compares ranks, so it also captures monotonic "
+                 "relationships that are not linear")
+    return Section('Correlation Matrix', "Correlation Matrix of the Numerical Variables", (fig,), insights)
+
+
+# Sections built from row-level data; the page builds their figures only on request
+# (they take ``figures=False`` to build the title and insights alone)
+HEAVY = [claims_by_age, claims_by_income]
+
+# Sections answered from group means and column totals alone, which approx.py can estimate
+APPROXIMATE = [kpis, income_by_age_group, claim_frequency_by_age_group, claims_by_gender, claims_by_car_type,
+               claims_by_education, claim_frequency_by_marital_status, claims_by_car_use, claims_by_job_tenure]
+
+MULTIVARIATE_QUESTIONS = [
+    claims_by_age, claims_by_income, income_by_age_group, claim_frequency_by_age_group, claims_by_gender,
+    claims_by_car_type, claims_by_education, claim_frequency_by_marital_status, claims_by_car_use,
+    claims_by_job_tenure,
+]
+
+MULTIVARIATE_SUMMARY = """
+These multivariate analyses reveal important relationships in the car insurance dataset:
+
+1. **Demographics Matter**: Age, gender, and marital status all play roles in claim patterns
+2. **Income Correlation**: Higher income correlates with different claim behaviors
+3. **Vehicle Factors**: Car type and usage significantly impact claims
+4. **Stability Indicators**: Education and job tenure reflect overall stability and risk profile
+5. **Risk Assessment**: Multiple factors work together to determine insurance risk
+"""
+
+
+# Risk Scores
+# The builders take the model version so that the figure cache keeps one entry per model
+
+RISK_DESCRIPTION = """
+Every policy is scored by two gradient-boosted models trained on the cleaned features:
+the probability that it files a claim, and the amount expected if it does. Their
+product is the policy's expected claim amount.
+"""
+
+
+def _score_histogram(values, nbins):
+    counts, edges = np.histogram(values, bins=nbins)
+    return Histogram(edges, counts)
+
+
+def risk_overview(scope, model_version):
+    model = scoring.load_model()
+    risk = scope.risk(out_of_fold=True)
+    flag, amount = model.cv_['claim_flag'], model.cv_['clm_amt']
+    return Section('Risk Overview', 'Risk Score Overview', metrics=(
+        ("Policies Scored", f"{len(risk):,}"),
+        ("Mean Claim Probability", f"{risk['claim_probability'].mean():.1%}"),
+        ("Observed Claim Rate", f"{risk['claim_flag'].mean():.1%}"),
+        ("Expected Claim Amount", f"${risk['expected_clm_amt'].sum():,.0f}"),
+        ("Actual Claim Amount", f"${risk['clm_amt'].sum():,.0f}"),
+    ), insights=f"""
+    **Q: How reliable are the scores?** ({len(model.cv_)} models, {model.n_rows_:,} policies, trained {model.trained_})
+    - Claim probability: ROC AUC {flag['roc_auc']['mean']:.3f} ± {flag['roc_auc']['std']:.3f}, Brier score {flag['brier']['mean']:.3f}
+    - Claim amount given a claim: mean absolute error ${amount['mae']['mean']:,.0f} ± ${amount['mae']['std']:,.0f}
+    - Cross-validated on held-out folds; the predicted rate and amount above are out-of-fold, each policy scored by the models fitted without it (model version {model_version[:16]})
+    - The distributions below score the book with the final models, fitted on every policy
+    """)
+
+
+def claim_probability_distribution(scope, model_version):
+    probability = scope.risk()['claim_probability']
+    fig = histogram_figure(_score_histogram(probability, 40), title="Claim Probability Distribution",
+                           label='Claim Probability')
+    return Section('Claim Probability', "Claim Probability Distribution", (fig,), f"""
+    **Q: How is claim risk spread across the book?**
+    - Median Probability: {probability.median():.1%}
+    - Policies above 50%: {(probability > 0.5).sum():,} ({(probability > 0.5).mean() * 100:.1f}%)
+    - Policies below 10%: {(probability < 0.1).sum():,} ({(probability < 0.1).mean() * 100:.1f}%)
+    """)
+
+
+def expected_amount_distribution(scope, model_version):
+    expected = scope.risk()['expected_clm_amt']
+    fig = histogram_figure(_score_histogram(expected, 50), title="Expected Claim Amount Distribution",
+                           label='Expected Claim Amount ($)')
+    top = expected.sort_values(ascending=False)
+    top_decile = top.iloc[:max(len(top) // 10, 1)].sum() / max(top.sum(), 1e-9)
+    return Section('Expected Claim Amount', "Expected Claim Amount Distribution", (fig,), f"""
+    **Q: Where is the expected cost concentrated?**
+    - Average Expected Amount: ${expected.mean():,.0f}
+    - Median Expected Amount: ${expected.median():,.0f}
+    - Share of the expected cost in the riskiest 10% of policies: {top_decile:.1%}
+    """)
+
+
+def calibration(scope, model_version):
+    # Out-of-fold scores: the final models' scores of their own training rows overstate calibration
+    risk = scope.risk(out_of_fold=True)
+    n_bins = min(10, max(len(risk) // 20, 1))
+    deciles = pd.qcut(risk['claim_probability'].rank(method='first'), n_bins, labels=False) + 1
+    table = risk.groupby(deciles).agg(
+        policies=('claim_flag', 'size'), predicted=('claim_probability', 'mean'),
+        observed=('claim_flag', 'mean'), expected_amount=('expected_clm_amt', 'mean'),
+        actual_amount=('clm_amt', 'mean'))
+    table.index.name = 'Risk Decile'
+    chart = table[['predicted', 'observed']].reset_index().melt(
+        id_vars='Risk Decile', var_name='Claim Rate', value_name='Rate')
+    fig = px.bar(chart, x='Risk Decile', y='Rate', color='Claim Rate', barmode='group',
+                 title="Predicted vs Observed Claim Rate by Risk Decile")
+    lift = table['observed'].iloc[-1] / max(table['observed'].iloc[0], 1e-9)
+    return Section('Calibration', "Do the Scores Match the Claims?", (fig,), f"""
+    **Q: Do policies with higher scores claim more often?**
+    - Riskiest decile claim rate: {table['observed'].iloc[-1]:.1%} (predicted {table['predicted'].iloc[-1]:.1%})
+    - Safest decile claim rate: {table['observed'].iloc[0]:.1%} (predicted {table['predicted'].iloc[0]:.1%})
+    - Lift of the riskiest over the safest decile: {lift:.1f}x
+    """, table=table)
+
+
+def risk_by_car_type(scope, model_version):
+    risk = scope.risk()
+    by_type = risk.groupby('car_type', observed=True).agg(
+        probability=('claim_probability', 'mean'), expected=('expected_clm_amt', 'mean')).reset_index()
+    by_type.columns = ['Car Type', 'Mean Claim Probability', 'Mean Expected Claim Amount']
+    fig = px.bar(by_type, x='Car Type', y='Mean Expected Claim Amount',
+                 color='Mean Claim Probability', title="Expected Claim Amount by Car Type")
+    riskiest = by_type.loc[by_type['Mean Expected Claim Amount'].idxmax()]
+    return Section('Risk by Car Type', "Which Vehicles Carry the Most Expected Cost?", (fig,), f"""
+    - Highest expected cost: {riskiest['Car Type']} (${riskiest['Mean Expected Claim Amount']:,.0f} per policy, {riskiest['Mean Claim Probability']:.1%} claim probability)
+    - Colour shows the mean claim probability, height the expected amount per policy
+    """)
+
+
+RISK = [risk_overview, claim_probability_distribution, expected_amount_distribution, calibration, risk_by_car_type]
@@ -0,0 +1,141 @@
+"""Mergeable streaming sketches.
+
+- ``DistinctCounter``: distinct count that is exact (a set of 64-bit hashes)
+  up to EXACT_LIMIT values and a HyperLogLog estimate above that.
+- ``QuantileSketch``: a KLL quantile sketch.
+
+Both accept values in vectorized batches, have a fixed memory ceiling and
+merge with another sketch of the same kind, so partial results from chunks,
+workers or daily partitions can be combined.
+"""
+
+import numpy as np
+import pandas as pd
+
+EXACT_LIMIT = 16_384
+HLL_PRECISION = 14  # 2**14 registers, about 0.8% standard error
+
+
+def hash_values(series):
+    """64-bit hashes of the non-missing values of a Series."""
+    return pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy()
+
+
+class DistinctCounter:
+    """Distinct count: exact while small, HyperLogLog once it grows."""
+
+    def __init__(self, precision=HLL_PRECISION, exact_limit=EXACT_LIMIT):
+        self.precision = precision
+        self.exact_limit = exact_limit
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.registers = None
+
+    @property
+    def exact(self):
+        return self.registers is None
+
+    def update(self, hashes):
+        if self.exact:
+            self.hashes = np.union1d(self.hashes, hashes)
+            if len(self.hashes) > self.exact_limit:
+                self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+                self._add_to_registers(self.hashes)
+                self.hashes = np.empty(0, dtype=np.uint64)
+        else:
+            self._add_to_registers(hashes)
+        return self
+
+    def _add_to_registers(self, hashes):
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = (hashes & np.uint64((1 << (64 - p)) - 1)).astype(np.float64)
+        # frexp gives the exact bit length of the (< 2**53) remainder
+        _, bit_length = np.frexp(rest)
+        rank = (64 - p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        merged = DistinctCounter(self.precision, self.exact_limit)
+        merged.update(self.hashes)
+        merged.update(other.hashes)
+        for registers in (self.registers, other.registers):
+            if registers is not None:
+                if merged.exact:
+                    merged.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+                    merged._add_to_registers(merged.hashes)
+                    merged.hashes = np.empty(0, dtype=np.uint64)
+                np.maximum(merged.registers, registers, out=merged.registers)
+        return merged
+
+    def estimate(self):
+        if self.exact:
+            return len(self.hashes)
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and empty:
+            # Small-range correction (linear counting)
+            return int(round(m * np.log(m / empty)))
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """KLL sketch: compactors whose items carry weight 2**level."""
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+        return self
+
+    def _compress(self):
+        # Compact the lowest over-full level until every level fits its capacity
+        while True:
+            full = [h for h, items in enumerate(self.levels) if len(items) > self._capacity(h)]
+            if not full:
+                return
+            level = full[0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # An odd item out stays behind; every other one of the rest moves up
+            odd = len(items) % 2
+            promoted = items[odd:][self._rng.integers(2)::2]
+            self.levels[level] = items[:odd]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def merge(self, other):
+        merged = QuantileSketch(self.k)
+        depth = max(len(self.levels), len(other.levels))
+        merged.levels = [
+            np.concatenate([s.levels[h] for s in (self, other) if h < len(s.levels)])
+            for h in range(depth)
+        ]
+        merged.count = self.count + other.count
+        merged._compress()
+        return merged
+
+    def quantiles(self, qs):
+        """Approximate quantiles (``qs`` in [0, 1])."""
+        if not self.count:
+            return np.full(len(qs), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_), 2.0 ** h) for h, items_ in enumerate(self.levels)])
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(qs) * cumulative[-1]
+        positions = np.searchsorted(cumulative, ranks, side='left').clip(max=len(items) - 1)
+        return items[order][positions]
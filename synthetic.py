@@ -0,0 +1,149 @@
+"""Synthetic claims extracts shaped like car_insurance_claim.csv.
+
+    python synthetic.py 1000000 benchmarks/data/synthetic_1m.csv
+
+Rows are drawn from a Gaussian copula fitted to the shipped raw extract:
+
+- every column's marginal distribution is its empirical distribution (same
+  category sets, including the "z_" prefixed values, same value ranges);
+- the rank correlations between columns (e.g. age and income, income and
+  home value) follow the original;
+- amounts are zero exactly when their count/flag is zero (CLM_AMT and
+  CLAIM_FLAG, OLDCLAIM and CLM_FREQ), as in the original;
+- missing values appear at each column's original rate;
+- BIRTH is derived from AGE and IDs are unique, in the original formats.
+
+Rows are generated and written in chunks, so the output size is not limited
+by memory.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from data import RAW_CSV
+
+CURRENCY_COLUMNS = ['INCOME', 'HOME_VAL', 'BLUEBOOK', 'OLDCLAIM', 'CLM_AMT']
+MONTHS = np.array(['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'])
+CHUNKSIZE = 500_000
+
+# Amount column -> the count/flag column that is zero exactly when it is
+ZERO_LINKED = {'CLM_AMT': 'CLAIM_FLAG', 'OLDCLAIM': 'CLM_FREQ'}
+
+
+def _parse_currency(series):
+    return pd.to_numeric(series.str.replace(r'[$,]', '', regex=True), errors='coerce')
+
+
+def _format_currency(values):
+    text = pd.Series(values).map('${:,.0f}'.format)
+    return text.where(~np.isnan(values))
+
+
+class ClaimsGenerator:
+    """Gaussian-copula model of the raw extract."""
+
+    def __init__(self, source=RAW_CSV):
+        raw = pd.read_csv(source, encoding='utf-8-sig')
+        for col in CURRENCY_COLUMNS:
+            raw[col] = _parse_currency(raw[col])
+        self.columns = [col for col in raw.columns if col not in ('ID', 'BIRTH')]
+        self.missing_rate = raw[self.columns].isna().mean()
+
+        # Each column as numbers: categories become codes ordered by frequency
+        self.categories = {}
+        numeric = {}
+        for col in self.columns:
+            if raw[col].dtype == object:
+                categories = raw[col].value_counts().index
+                self.categories[col] = np.asarray(categories)
+                numeric[col] = pd.Series(pd.Categorical(raw[col], categories=categories).codes,
+                                         index=raw.index).where(raw[col].notna())
+            else:
+                numeric[col] = raw[col]
+        numeric = pd.DataFrame(numeric)
+
+        # Sorted observed values give each marginal's inverse CDF; linked amounts keep their non-zero part
+        self.sorted_values = {col: np.sort(numeric[col].dropna().to_numpy()) for col in self.columns}
+        for col in ZERO_LINKED:
+            self.sorted_values[col] = self.sorted_values[col][self.sorted_values[col] > 0]
+        # Correlation of the normal scores (ties ranked on average)
+        scores = numeric.rank(pct=True).apply(lambda u: pd.Series(_normal_score(u), index=u.index))
+        corr = scores.corr().fillna(0).to_numpy(copy=True)
+        np.fill_diagonal(corr, 1.0)
+        # Nearest positive semi-definite matrix, for pairwise-complete estimates
+        eigenvalues, eigenvectors = np.linalg.eigh(corr)
+        self.cholesky = np.linalg.cholesky(
+            eigenvectors @ np.diag(np.clip(eigenvalues, 1e-6, None)) @ eigenvectors.T)
+
+    def sample(self, n, rng, first_id=0):
+        """``n`` raw rows as a DataFrame in the original column layout."""
+        z = rng.standard_normal((n, len(self.columns))) @ self.cholesky.T
+        u = ndtr(z)
+        out = {}
+        # Linked amounts after the columns they depend on
+        for j, col in sorted(enumerate(self.columns), key=lambda item: item[1] in ZERO_LINKED):
+            values = self.sorted_values[col]
+            uj = u[:, j]
+            if col in ZERO_LINKED:
+                # Re-spread the latent values of the non-zero rows over the non-zero marginal
+                nonzero = out[ZERO_LINKED[col]] != 0
+                uj = np.zeros(n)
+                uj[nonzero] = pd.Series(u[nonzero, j]).rank(pct=True).to_numpy() - 0.5 / max(nonzero.sum(), 1)
+            drawn = values[np.minimum((uj * len(values)).astype(np.int64), len(values) - 1)]
+            if col in ZERO_LINKED:
+                drawn = np.where(nonzero, drawn, 0.0)
+            drawn = np.where(rng.random(n) < self.missing_rate[col], np.nan, drawn)
+            if col in self.categories:
+                codes = np.nan_to_num(drawn, nan=-1).astype(np.int64)
+                out[col] = pd.Series(self.categories[col][codes]).where(codes >= 0)
+            elif col in CURRENCY_COLUMNS:
+                out[col] = _format_currency(drawn)
+            else:
+                out[col] = drawn
+        df = pd.DataFrame({col: out[col] for col in self.columns})
+
+        df.insert(0, 'ID', first_id + rng.permutation(n) + 100_000_000)
+        df.insert(2, 'BIRTH', _birth_dates(df['AGE'].to_numpy(), rng))
+        # Whole-number columns without gaps are written as integers, as in the source
+        for col in self.columns:
+            if col not in self.categories and col not in CURRENCY_COLUMNS and df[col].notna().all():
+                df[col] = df[col].astype(np.int64)
+        return df
+
+    def write(self, n, path, seed=0, chunksize=CHUNKSIZE):
+        rng = np.random.default_rng(seed)
+        for start in range(0, n, chunksize):
+            chunk = self.sample(min(chunksize, n - start), rng, first_id=start)
+            chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+        return path
+
+
+def _normal_score(u):
+    # Keep the scores finite at the extremes
+    return ndtri(np.clip(u.to_numpy(), 1e-6, 1 - 1e-6))
+
+
+def _birth_dates(age, rng):
+    # e.g. 16MAR39, for a reference year of 1999
+    years = np.nan_to_num(1999 - age, nan=1960).astype(np.int64) % 100
+    days = rng.integers(1, 29, len(age))
+    months = MONTHS[rng.integers(0, 12, len(age))]
+    return pd.Series(days).astype(str).str.zfill(2) + months + pd.Series(years).astype(str).str.zfill(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('rows', type=int, help='number of rows to generate')
+    parser.add_argument('output', help='CSV file to write')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ClaimsGenerator().write(args.rows, args.output, args.seed)
+    print(f"Wrote {args.rows:,} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The modules live at the repository root, next to the Streamlit pages
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,34 @@
+"""Profiles built in-process (the app) and on a process pool (CLI, ingest) agree."""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import column_profile
+import data
+import schema
+
+
+@pytest.fixture(scope='module')
+def path(tmp_path_factory):
+    df = schema.apply_cleaned(pd.read_csv(data.CLEANED_CSV, index_col=0))
+    path = tmp_path_factory.mktemp('profiles') / 'cleaned.parquet'
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=3_000)
+    return path
+
+
+def _figures(profile):
+    return pd.DataFrame({col: [p.rows, p.nulls, p.min, p.max, p.sum, p.unique] for col, p in profile.items()},
+                        index=['rows', 'nulls', 'min', 'max', 'sum', 'unique'], dtype='float64')
+
+
+def test_in_process_profile_matches_the_pool(path, monkeypatch):
+    pooled = column_profile.profile_file(path, n_jobs=2)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("profile_file started a process pool")
+
+    monkeypatch.setattr(column_profile, 'ProcessPoolExecutor', no_pool)
+    monkeypatch.setattr(column_profile.os, 'cpu_count', lambda: 4)
+    pd.testing.assert_frame_equal(_figures(column_profile.profile_file(path)), _figures(pooled))
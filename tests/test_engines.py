@@ -0,0 +1,62 @@
+"""Every query engine must answer the page workload like the pandas engine.
+
+The engines run over two Parquet files written from the cleaned dataset, the
+second with gaps in some measures, for each selection in ``engines.SELECTIONS``.
+An engine is skipped only when its package is not installed.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import columnar
+import data
+import engines
+import schema
+
+
+@pytest.fixture(scope='module')
+def paths(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('engines')
+    df = schema.apply_cleaned(pd.read_csv(data.CLEANED_CSV, index_col=0))
+    first, second = df.iloc[:len(df) // 2], df.iloc[len(df) // 2:].copy()
+    # Missing values exercise the pairwise-complete statistics
+    rng = np.random.default_rng(0)
+    for col in ['income', 'yoj', 'home_val']:
+        second.loc[rng.random(len(second)) < 0.1, col] = np.nan
+    result = [directory / 'part-0.parquet', directory / 'part-1.parquet']
+    columnar.write(first, result[0])
+    columnar.write(second, result[1])
+    return result
+
+
+@pytest.fixture(scope='module')
+def expected(paths):
+    reference = engines.get('pandas', paths)
+    return {selection: engines.workload(reference, selection) for selection in engines.SELECTIONS}
+
+
+@pytest.mark.parametrize('selection', engines.SELECTIONS, ids=lambda selection: '; '.join(f'{col}={chosen}' for col, chosen in selection) or 'all rows')
+@pytest.mark.parametrize('name', [name for name in engines.ENGINES if name != 'pandas'])
+def test_engine_matches_pandas(name, selection, paths, expected):
+    package = engines.ENGINES[name].package
+    if package:
+        pytest.importorskip(package)
+    actual = engines.workload(engines.get(name, paths), selection)
+    mismatches = [key for key, value in expected[selection].items()
+                  if not engines.same(value, actual[key])]
+    assert not mismatches, f"{name} differs from pandas on {', '.join(mismatches)}"
+
+
+def test_available_engines_include_pandas():
+    assert 'pandas' in engines.available()
+
+
+def test_engines_of_earlier_versions_are_dropped(monkeypatch):
+    monkeypatch.setattr(engines, '_engines', {})
+    monkeypatch.setattr(engines.data, 'dataset_version', lambda kind: 'v1')
+    first = engines.get('pandas')
+    assert engines.get('pandas') is first
+    monkeypatch.setattr(engines.data, 'dataset_version', lambda kind: 'v2')
+    assert engines.get('pandas') is not first
+    assert list(engines._engines) == [('pandas', 'v2')]
@@ -0,0 +1,46 @@
+"""The figure cache's fast path must send the element ``st.plotly_chart`` sends.
+
+``figure_cache._send_spec`` builds the plotly chart proto from Streamlit
+internals; the element id, config and every other field must come out
+exactly as the public API builds them for the same figure.
+"""
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import figure_cache
+
+
+def _chart(use_container_width):
+    import plotly.express as px
+    import plotly.io as pio
+    import streamlit as st
+
+    import figure_cache
+
+    fig = px.bar(x=['a', 'b', 'c'], y=[1, 3, 2], title="Claims")
+    if st.session_state.get('fast'):
+        # A cached section's figure, as figure_cache stores it
+        figure_cache._send_spec(pio.to_json(fig, validate=False), use_container_width, 'streamlit')
+    else:
+        st.plotly_chart(fig, use_container_width=use_container_width)
+
+
+@pytest.mark.skipif(st.__version__ not in figure_cache.FAST_PATH_VERSIONS,
+                    reason=f"the fast path is off on Streamlit {st.__version__}")
+@pytest.mark.parametrize('use_container_width', [True, False])
+def test_fast_path_matches_plotly_chart(use_container_width):
+    # One app for both, as the element id depends on the script
+    at = AppTest.from_function(_chart, args=(use_container_width,), default_timeout=30)
+    public = at.run().get('plotly_chart')[0].proto
+    at.session_state['fast'] = True
+    fast = at.run().get('plotly_chart')[0].proto
+    assert not at.exception
+    assert fast == public
+
+
+def test_spec_files_cover_the_modules_sections_come_from():
+    # Directly and indirectly imported modules, and the modules that pick the scope and render
+    assert {'sections.py', 'cube.py', 'schema.py', 'data.py', 'columnar.py', 'sampling.py',
+            'approx.py', 'filters.py', 'render.py'} <= set(figure_cache.SPEC_FILES)
@@ -0,0 +1,15 @@
+"""Segment labels and report directories of report.py."""
+
+import report
+
+
+def test_flag_segments_read_yes_no():
+    assert report.value_label('mstatus', True) == 'Yes'
+    assert report.value_label('parent1', False) == 'No'
+    assert report.segment_slug('red_car', True).startswith('red_car=yes-')
+    assert report._scope('revoked', False).label == 'revoked = No'
+
+
+def test_other_segments_keep_their_values():
+    assert report.value_label('car_type', 'Sports Car') == 'Sports Car'
+    assert report.segment_slug('car_type', 'Sports Car').startswith('car_type=sports-car-')